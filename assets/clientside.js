@@ -0,0 +1,117 @@
+// Callbacks which only toggle modals, indicator buttons and their labels, run in the browser without a request to the server.
+// Dash loads every file from the assets directory, functions are registered in main.py with ClientsideFunction("tickery", name).
+
+// Same as BG_COLOR in main.py
+const BG_COLOR = "#211F32";
+
+const INDICATOR_BUTTON_STYLE = {
+    "display": "flex",
+    "margin-right": "0px",
+    "padding": "5px",
+    "background-color": BG_COLOR,
+    "font-size": "12px",
+};
+const CLEAR_BUTTON_STYLE = {
+    "display": "flex",
+    "margin-left": "0px",
+    "padding": "5px",
+    "background-color": BG_COLOR,
+    "font-size": "12px",
+};
+const HIDDEN = { "display": "none" };
+
+// Text of the search bar before the last change
+let typedText = "";
+
+const INDICATOR_MODALS = ["Moving average", "Bollinger Bands", "Stochastic", "MACD"];
+
+
+// Formats parameter the way Python does in f-strings, so labels match ones rendered by the server
+function formatParameter(value) {
+    return value == null ? "None" : String(value);
+}
+
+
+// Returns callback updating indicator button label with its name (first name_length characters of current label) and parameters
+function indicatorLabel(nameLength) {
+    return function (n_clicks, ...args) {
+        if (n_clicks == null) {
+            return window.dash_clientside.no_update;
+        }
+        const indicatorName = args.pop();
+        const parameters = args.map(formatParameter).join(", ");
+
+        return [null, `${indicatorName.slice(0, nameLength)}(${parameters})`];
+    };
+}
+
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    tickery: {
+        // Searches for typed ticker after pressing Enter, picking one of suggestions or clearing the search bar, not on every typed letter.
+        // Every search gets next number, so the server can tell the latest one even if requests arrive in a different order
+        submitSearch: function (n_submit, ticker_text, suggestions, search) {
+            const triggered = window.dash_clientside.callback_context.triggered.map((t) => t.prop_id);
+            const submitted = triggered.includes("input_ticker.n_submit");
+            // Suggestion matching the text only after typing one more letter (e.g. "AA" on the way to "AAPL") wasn't picked
+            const typed = ticker_text && ticker_text.slice(0, -1) === typedText;
+            const picked = !typed && (suggestions || []).some((option) => option.props.value === ticker_text);
+            typedText = ticker_text || "";
+
+            if (!submitted && !picked && ticker_text) {
+                return window.dash_clientside.no_update;
+            }
+            if (!submitted && ticker_text === search.ticker) {
+                return window.dash_clientside.no_update;
+            }
+            return { ticker: ticker_text, number: search.number + 1 };
+        },
+
+        // Displays modal window for input of indicator settings
+        showIndicatorModal: function (indicator_value) {
+            return INDICATOR_MODALS.map((name) => name === indicator_value);
+        },
+
+        // After confirming settings in modal window, clears indicator dropdown and adds indicator button and its clear button
+        showIndicatorButtons: function (n_clicks) {
+            if (n_clicks == null) {
+                return window.dash_clientside.no_update;
+            }
+            return [null, INDICATOR_BUTTON_STYLE, CLEAR_BUTTON_STYLE];
+        },
+
+        // Measures width of the chart, so price data is reduced to about as many points as it has pixels
+        chartWidth: function (id, current_width) {
+            const chart = document.getElementById(id);
+            const width = chart && chart.offsetWidth ? chart.offsetWidth : window.innerWidth;
+            return width === current_width ? window.dash_clientside.no_update : width;
+        },
+
+        // Shows modal window again after clicking indicator button
+        showModal: function (n_clicks) {
+            return n_clicks != null;
+        },
+
+        // Updates indicator settings shown on indicator buttons
+        updateMaLabel: indicatorLabel(14),
+        updateBbLabel: indicatorLabel(15),
+        updateStLabel: indicatorLabel(10),
+        updateMacdLabel: indicatorLabel(4),
+
+        // After clicking "X" button, deletes indicator from chart, indicator button and clear button
+        deleteIndicatorButtons: function (n_clicks) {
+            if (n_clicks == null) {
+                return window.dash_clientside.no_update;
+            }
+            return [HIDDEN, HIDDEN, null];
+        },
+
+        // Same as deleteIndicatorButtons, also removing indicator subplot
+        deleteIndicatorPanel: function (n_clicks) {
+            if (n_clicks == null) {
+                return window.dash_clientside.no_update;
+            }
+            return [HIDDEN, HIDDEN, [], null];
+        },
+    },
+});
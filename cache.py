@@ -0,0 +1,77 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import diskcache
+
+# Declaring constant variables
+DATA_DIR = os.environ.get(
+    "TICKERY_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+# Cache lives on disk, so all worker processes share the same loaded values
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+CACHE_SIZE_LIMIT = 2 ** 30
+# Seconds after which refresh claimed by a (possibly killed) process can be claimed again
+REFRESH_TIMEOUT = 300
+
+_cache = diskcache.Cache(
+    CACHE_DIR, size_limit=CACHE_SIZE_LIMIT, eviction_policy="least-recently-used"
+)
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache")
+
+logger = logging.getLogger(__name__)
+
+
+def cached(key, loader, expiry):
+    """Returns value stored under provided key, loading it on the first call. Expired values are returned immediately and refreshed in the background.
+
+    expiry is called with the loaded value and returns the time (in seconds since epoch) until which the value is fresh, or None if it should not be cached at all"""
+
+    entry = _cache.get(key)
+    if entry is not None:
+        value, expires_at = entry
+        # Only one thread of one process refreshes the value
+        if time.time() >= expires_at and _cache.add(
+            ("refreshing", key), True, expire=REFRESH_TIMEOUT
+        ):
+            _refresh_executor.submit(_refresh, key, loader, expiry)
+        return value
+
+    value = loader()
+    _store(key, value, expiry)
+
+    return value
+
+
+def shared_lock(name, expire=None):
+    """Returns lock held across threads and worker processes, released automatically after expire seconds"""
+
+    return diskcache.Lock(_cache, ("lock", name), expire=expire)
+
+
+def clear():
+    """Removes all cached values"""
+
+    _cache.clear()
+
+
+def _store(key, value, expiry):
+    """Stores value together with its expiry time, least recently used entries are evicted over the size limit"""
+
+    expires_at = expiry(value)
+    if expires_at is None:
+        return
+
+    _cache.set(key, (value, expires_at))
+
+
+def _refresh(key, loader, expiry):
+    """Reloads expired value in the background, stale value stays in cache if loading fails"""
+
+    try:
+        _store(key, loader(), expiry)
+    except Exception:
+        logger.exception("Refreshing cached value of %s failed", key)
+    finally:
+        _cache.delete(("refreshing", key))
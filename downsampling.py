@@ -0,0 +1,123 @@
+import numpy as np
+import plotly.graph_objects as go
+
+# Reduces price and indicator traces of long ranges (e.g. months of 1m bars) to about as many points as the chart has pixels.
+# Traces are drawn against bar numbers, so points are picked by their position and keep their original x values.
+
+# Declaring constant variables
+# Used until the browser reports width of the chart
+DEFAULT_CHART_WIDTH = 1200
+# Line points per pixel of chart width, LTTB keeps the shape of the line with that many of them
+LINE_POINTS_PER_PIXEL = 1
+# Candles narrower than that are merged into one candle of the whole bucket
+PIXELS_PER_CANDLE = 3
+# Upper bound of points per trace, also on very wide screens
+MAX_POINTS = 3000
+# Line traces of more bars are drawn with WebGL instead of SVG
+WEBGL_THRESHOLD = 1000
+
+
+def line_points(width=None):
+    """Returns number of points a line trace is reduced to on chart of provided width (in pixels)"""
+
+    return min(int((width or DEFAULT_CHART_WIDTH) * LINE_POINTS_PER_PIXEL), MAX_POINTS)
+
+
+def candle_buckets(width=None):
+    """Returns number of candles drawn on chart of provided width (in pixels)"""
+
+    return min((width or DEFAULT_CHART_WIDTH) // PIXELS_PER_CANDLE, MAX_POINTS)
+
+
+def lttb_indices(y, points):
+    """Returns indices of points picked by Largest-Triangle-Three-Buckets from equally spaced values, all of them if there are not more than provided number of points.
+
+    First and last point are always kept, from every bucket in between the point forming the largest triangle with the previously picked point and the mean of the next bucket"""
+
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= points or points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    # Missing values don't have area, they are picked only from buckets without any value
+    with np.errstate(invalid="ignore"):
+        sums = np.add.reduceat(np.nan_to_num(y[1 : n - 1]), edges[:-1] - 1)
+        counts = np.add.reduceat(~np.isnan(y[1 : n - 1]), edges[:-1] - 1)
+        means = sums / counts
+    next_means = np.append(means[1:], y[-1])
+    next_x = np.append((edges[1:-1] + edges[2:] - 1) / 2, n - 1)
+
+    picked = np.empty(points, dtype=int)
+    picked[0] = 0
+    picked[-1] = n - 1
+    previous = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        x = np.arange(start, end)
+        area = np.abs(
+            (previous - next_x[i]) * (y[start:end] - y[previous])
+            - (previous - x) * (next_means[i] - y[previous])
+        )
+        area = np.where(np.isnan(area), -1, area)
+        previous = start + int(np.argmax(area))
+        picked[i + 1] = previous
+
+    return picked
+
+
+def bucket_starts(n, buckets):
+    """Returns first indices of provided number of (nearly) equal buckets of n values"""
+
+    return np.unique(np.linspace(0, n, buckets + 1).astype(int)[:-1])
+
+
+def aggregate_ohlc(open, high, low, close, starts):
+    """Returns open, high, low and close of buckets starting at provided indices: open of the first bar, highest high, lowest low and close of the last bar"""
+
+    ends = np.append(starts[1:], len(close)) - 1
+
+    return (
+        np.asarray(open, dtype=float)[starts],
+        np.fmax.reduceat(np.asarray(high, dtype=float), starts),
+        np.fmin.reduceat(np.asarray(low, dtype=float), starts),
+        np.asarray(close, dtype=float)[ends],
+    )
+
+
+def downsample_trace(trace, width=None):
+    """Returns price or indicator trace reduced to the number of points fitting chart of provided width, other traces are returned unchanged.
+
+    Candles and OHLC bars are merged into buckets, lines are reduced with LTTB and drawn with WebGL if they are long"""
+
+    if isinstance(trace, (go.Candlestick, go.Ohlc)):
+        x = np.asarray(trace.x)
+        if len(x) <= candle_buckets(width):
+            return trace
+
+        starts = bucket_starts(len(x), candle_buckets(width))
+        open, high, low, close = aggregate_ohlc(
+            trace.open, trace.high, trace.low, trace.close, starts
+        )
+        trace.update(x=x[starts], open=open, high=high, low=low, close=close)
+        return trace
+
+    if not isinstance(trace, go.Scatter) or trace.y is None:
+        return trace
+
+    x = np.asarray(trace.x)
+    y = np.asarray(trace.y, dtype=float)
+    picked = lttb_indices(y, line_points(width))
+    trace.update(x=x[picked], y=y[picked])
+    if len(y) <= WEBGL_THRESHOLD:
+        return trace
+
+    properties = trace.to_plotly_json()
+    properties.pop("type")
+    return go.Scattergl(properties)
+
+
+def downsample_traces(traces, width=None):
+    """Returns list of provided traces, each reduced to the number of points fitting chart of provided width"""
+
+    return [downsample_trace(trace, width) for trace in traces]
@@ -1,32 +1,129 @@
+import os
+import re
+import json
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup as bs
-import re
+from bs4 import SoupStrainer
 import pycountry
 
+# Declaring constant variables
+LOGOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "logos")
+LOGOS_URL = "/assets/logos"
+LOGO_TTL = 30 * 24 * 3600
+LOGO_CLASS = "tv-circle-logo tv-circle-logo--xxlarge medium-xoKMfU7r"
+# Connect and read timeouts (in seconds)
+REQUEST_TIMEOUT = (3.05, 10)
+
+
+def _create_session():
+    """Returns HTTP session reusing pooled connections and retrying transient errors"""
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = "Mozilla/5.0"
+
+    return session
+
+
+session = _create_session()
+
 
 def find_logo(ticker):
+    """Returns url of company logo saved in assets, downloading it from TradingView only when it is missing or outdated"""
+
+    ticker = ticker.upper()
+    cached_logo = _read_cached_logo(ticker)
+    if cached_logo is not None and time.time() - cached_logo["fetched"] < LOGO_TTL:
+        return f"{LOGOS_URL}/{cached_logo['file']}"
+
+    try:
+        logo_url = scrape_logo_url(ticker)
+        file_name = _save_logo(ticker, logo_url)
+    except Exception:
+        # Outdated logo is still better than no logo at all
+        if cached_logo is not None:
+            return f"{LOGOS_URL}/{cached_logo['file']}"
+        raise
+
+    return f"{LOGOS_URL}/{file_name}"
+
+
+def scrape_logo_url(ticker):
     """Scrapes TradingView website in order to get logo of company based on provided ticker"""
 
     url = f"https://www.tradingview.com/symbols/{ticker}"
-    pattern = r'src="(.*?)"'
 
-    response = requests.get(url)
-    soup = bs(response.content, "html.parser")
-    img_elements = soup.find_all(
-        "img", class_="tv-circle-logo tv-circle-logo--xxlarge medium-xoKMfU7r"
+    response = session.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    # Parsing only logo images instead of the whole page
+    soup = bs(
+        response.content,
+        "html.parser",
+        parse_only=SoupStrainer("img", class_=LOGO_CLASS),
     )
-    img_element = str(img_elements[0])
-    match = re.findall(pattern, img_element)
-    logo_url = match[0]
+    img_elements = soup.find_all("img")
+    logo_url = img_elements[0]["src"]
 
     return logo_url
 
 
+def _read_cached_logo(ticker):
+    """Returns saved logo details (file name, source url and download time) or None if there is no logo saved"""
+
+    path = os.path.join(LOGOS_DIR, f"{ticker}.json")
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path) as file:
+            cached_logo = json.load(file)
+    except ValueError:
+        # Details are being written by another request right now
+        return None
+    if not os.path.exists(os.path.join(LOGOS_DIR, cached_logo["file"])):
+        return None
+
+    return cached_logo
+
+
+def _save_logo(ticker, logo_url):
+    """Downloads logo image into assets together with its source url, returns name of the saved image file"""
+
+    response = session.get(logo_url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+
+    extension = os.path.splitext(logo_url.split("?")[0])[1] or ".svg"
+    file_name = f"{ticker}{extension}"
+    os.makedirs(LOGOS_DIR, exist_ok=True)
+    with open(os.path.join(LOGOS_DIR, file_name), "wb") as file:
+        file.write(response.content)
+
+    # Details are written last, so logo counts as cached only once the image is complete.
+    # No temporary files are used, as removing files from assets triggers Dash hot reload
+    cached_logo = {"file": file_name, "url": logo_url, "fetched": time.time()}
+    with open(os.path.join(LOGOS_DIR, f"{ticker}.json"), "w") as file:
+        json.dump(cached_logo, file)
+
+    return file_name
+
+
 def find_bg_color(logo_url):
 
     pattern = r'fill="(.*?)"'
 
-    response = requests.get(logo_url)
+    response = session.get(logo_url, timeout=REQUEST_TIMEOUT)
     soup = bs(response.content, "html.parser")
     bg_color_code = str((soup.find_all("path"))[0])
     match = re.findall(pattern, bg_color_code)
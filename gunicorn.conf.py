@@ -0,0 +1,14 @@
+import os
+import multiprocessing
+
+# Gunicorn settings used by "gunicorn wsgi:server", every one can be overridden with an environment variable
+bind = os.environ.get("TICKERY_BIND", "0.0.0.0:1023")
+workers = int(
+    os.environ.get("TICKERY_WORKERS", min(multiprocessing.cpu_count() * 2 + 1, 8))
+)
+# Callbacks mostly wait for market data, so every worker serves requests on a few threads
+worker_class = "gthread"
+threads = int(os.environ.get("TICKERY_THREADS", 4))
+# Long statistics and Monte Carlo runs are background jobs, so requests themselves are short
+timeout = int(os.environ.get("TICKERY_TIMEOUT", 60))
+accesslog = "-"
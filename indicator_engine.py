@@ -0,0 +1,380 @@
+import hashlib
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
+from scipy.signal import lfilter
+
+# Pure NumPy calculations of chart indicators. Batch functions take whole price
+# arrays and return arrays of the same length (NaN until the window is filled).
+# Streaming classes keep rolling state so appending a new bar costs O(1).
+
+# Declaring constant variables
+# Memoized results are evicted (least recently used first) once their arrays take more bytes than that
+MAX_MEMOIZED_BYTES = 256 * 2 ** 20
+
+_results = OrderedDict()
+_results_bytes = 0
+_results_lock = threading.Lock()
+
+
+def sma(values, length):
+    """Returns simple moving average of provided values"""
+
+    return sma_many(values, [length])[0]
+
+
+def sma_many(values, lengths):
+    """Returns moving averages of many window lengths (one row per length) from one cumulative sum of provided values"""
+
+    values = np.asarray(values, dtype=float)
+    lengths = np.asarray(lengths, dtype=int).reshape(-1, 1)
+
+    # Like pandas rolling mean, windows with any missing value are missing
+    missing = np.isnan(values)
+    sums = _window_sums(np.where(missing, 0, values), lengths)
+    missing_counts = _window_sums(missing, lengths)
+    with np.errstate(invalid="ignore"):
+        return np.where(missing_counts == 0, sums / lengths, np.nan)
+
+
+def rolling_std(values, length):
+    """Returns rolling population standard deviation (ddof=0) of provided values"""
+
+    return rolling_std_many(values, [length])[0]
+
+
+def rolling_std_many(values, lengths):
+    """Returns rolling population standard deviations of many window lengths (one row per length)"""
+
+    values = np.asarray(values, dtype=float)
+    mean = sma_many(values, lengths)
+    mean_of_squares = sma_many(values ** 2, lengths)
+
+    return np.sqrt(np.maximum(mean_of_squares - mean ** 2, 0))
+
+
+def typical_price(high, low, close):
+    """Returns average of high, low and close prices"""
+
+    return (np.asarray(high, dtype=float) + low + close) / 3
+
+
+def bollinger_bands(high, low, close, length, std_dev):
+    """Returns upper band, moving average and lower band of the typical price"""
+
+    upper, middle, lower = bollinger_bands_many(high, low, close, [length], [std_dev])
+
+    return upper[0, 0], middle[0], lower[0, 0]
+
+
+def bollinger_bands_many(high, low, close, lengths, std_devs):
+    """Returns bollinger bands of the typical price for every combination of window lengths and standard deviation multipliers.
+
+    Moving averages have one row per length, upper and lower bands have shape (lengths, std_devs, bars)"""
+
+    prices = typical_price(high, low, close)
+    middle = sma_many(prices, lengths)
+    widths = (
+        np.asarray(std_devs, dtype=float).reshape(1, -1, 1)
+        * rolling_std_many(prices, lengths)[:, np.newaxis, :]
+    )
+
+    return middle[:, np.newaxis, :] + widths, middle, middle[:, np.newaxis, :] - widths
+
+
+def rolling_max(values, length):
+    """Returns maximum of the last length values"""
+
+    values = np.asarray(values, dtype=float)
+    filled = np.where(np.isnan(values), -np.inf, values)
+    result = maximum_filter1d(filled, length, origin=(length - 1) // 2)
+
+    return _mask_missing_windows(result, values, length)
+
+
+def rolling_min(values, length):
+    """Returns minimum of the last length values"""
+
+    values = np.asarray(values, dtype=float)
+    filled = np.where(np.isnan(values), np.inf, values)
+    result = minimum_filter1d(filled, length, origin=(length - 1) // 2)
+
+    return _mask_missing_windows(result, values, length)
+
+
+def _mask_missing_windows(result, values, length):
+    """Returns rolling result with NaN where the window isn't filled or contains missing value, like pandas rolling functions.
+
+    Filters aren't defined for NaN values (one can spoil neighbouring windows), so they are filled before filtering and masked here"""
+
+    missing_counts = _window_sums(np.isnan(values), np.array([[length]]))[0]
+
+    return np.where(missing_counts == 0, result, np.nan)
+
+
+def stochastic(high, low, close, length, slowing):
+    """Returns stochastic oscillator %K and its moving average %D"""
+
+    highest = rolling_max(high, length)
+    lowest = rolling_min(low, length)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = (np.asarray(close, dtype=float) - lowest) * 100 / (highest - lowest)
+
+    return k, sma(k, slowing)
+
+
+def ema(values, span):
+    """Returns exponential moving average starting at the first value (same as pandas ewm with adjust=False)"""
+
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return values
+
+    alpha = 2 / (span + 1)
+    result, _ = lfilter(
+        [alpha], [1, alpha - 1], values, zi=[(1 - alpha) * values[0]]
+    )
+
+    return result
+
+
+def macd(close, fast_span, slow_span):
+    """Returns fast EMA, slow EMA and MACD line (their difference)"""
+
+    fast = ema(close, fast_span)
+    slow = ema(close, slow_span)
+
+    return fast, slow, fast - slow
+
+
+def _window_sums(values, lengths):
+    """Returns sums of the last length values (NaN before the window is filled) for column of lengths, from one cumulative sum.
+
+    Cumulative sums restart at every block of the longest window length, so subtracting them doesn't lose precision on long series"""
+
+    values = np.asarray(values, dtype=float)
+    block = max(int(lengths.max()), 1)
+    blocks = -(-len(values) // block)
+    padded = np.zeros(blocks * block)
+    padded[: len(values)] = values
+    # Sums of the first 0..block values of every block
+    prefixes = np.zeros((blocks, block + 1))
+    prefixes[:, 1:] = np.cumsum(padded.reshape(blocks, block), axis=1)
+
+    ends = np.arange(1, len(values) + 1)
+    starts = ends - lengths
+    end_blocks, end_offsets = _block_positions(ends, block)
+    start_blocks, start_offsets = _block_positions(np.maximum(starts, 0), block)
+    # Window is never longer than a block, so it spans at most two of them
+    sums = (
+        prefixes[end_blocks, end_offsets]
+        - prefixes[start_blocks, start_offsets]
+        + np.where(end_blocks > start_blocks, prefixes[start_blocks, -1], 0)
+    )
+
+    return np.where(starts >= 0, sums, np.nan)
+
+
+def _block_positions(positions, block):
+    """Returns block and offset within it (1 to block, 0 only for position 0) of provided positions"""
+
+    blocks = np.maximum(positions - 1, 0) // block
+
+    return blocks, positions - blocks * block
+
+
+def memoized(function, arrays, *params):
+    """Returns function(*arrays, *params), reusing result of an earlier call with the same array contents and parameters.
+
+    Results are kept in an LRU bounded by bytes of their arrays and are read-only, as they are shared between callers"""
+
+    global _results_bytes
+
+    key = (
+        function.__name__,
+        fingerprint(*arrays),
+        tuple(tuple(param) if isinstance(param, list) else param for param in params),
+    )
+    with _results_lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key]
+
+    result = function(*arrays, *params)
+    for array in _result_arrays(result):
+        array.flags.writeable = False
+    size = _result_bytes(result)
+    if size > MAX_MEMOIZED_BYTES:
+        return result
+
+    with _results_lock:
+        if key not in _results:
+            _results[key] = result
+            _results_bytes += size
+        while _results_bytes > MAX_MEMOIZED_BYTES:
+            _, evicted = _results.popitem(last=False)
+            _results_bytes -= _result_bytes(evicted)
+
+    return result
+
+
+def _result_arrays(result):
+    """Returns arrays of memoized result, which is one array or tuple of them"""
+
+    return result if isinstance(result, tuple) else (result,)
+
+
+def _result_bytes(result):
+    """Returns number of bytes taken by arrays of memoized result"""
+
+    return sum(array.nbytes for array in _result_arrays(result))
+
+
+def fingerprint(*arrays):
+    """Returns hash of contents of provided arrays"""
+
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array, dtype=float)
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+
+    return digest.hexdigest()
+
+
+class StreamingSMA:
+    """Simple moving average updated one value at a time"""
+
+    def __init__(self, length):
+        self.length = length
+        self.window = deque()
+        self.sum = 0.0
+        self.missing = 0
+
+    def update(self, value):
+        """Adds new value and returns current average (NaN until the window is filled or while it contains NaN)"""
+
+        self._add(value, 1)
+        self.window.append(value)
+        if len(self.window) > self.length:
+            self._add(self.window.popleft(), -1)
+
+        if len(self.window) < self.length or self.missing:
+            return np.nan
+
+        return self.sum / self.length
+
+    def _add(self, value, sign):
+        """Adds value to (or removes it from) the running sum, NaN values are only counted"""
+
+        if np.isnan(value):
+            self.missing += sign
+        else:
+            self.sum += sign * value
+
+
+class StreamingBollingerBands:
+    """Bollinger bands of the typical price updated one bar at a time"""
+
+    def __init__(self, length, std_dev):
+        self.length = length
+        self.std_dev = std_dev
+        self.window = deque()
+        self.sum = 0.0
+        self.sum_of_squares = 0.0
+
+    def update(self, high, low, close):
+        """Adds new bar and returns current upper band, moving average and lower band"""
+
+        price = (high + low + close) / 3
+        self.window.append(price)
+        self.sum += price
+        self.sum_of_squares += price ** 2
+        if len(self.window) > self.length:
+            removed = self.window.popleft()
+            self.sum -= removed
+            self.sum_of_squares -= removed ** 2
+
+        if len(self.window) < self.length:
+            return np.nan, np.nan, np.nan
+
+        middle = self.sum / self.length
+        width = self.std_dev * np.sqrt(
+            max(self.sum_of_squares / self.length - middle ** 2, 0)
+        )
+
+        return middle + width, middle, middle - width
+
+
+class StreamingStochastic:
+    """Stochastic oscillator updated one bar at a time, rolling extremes are kept in monotonic queues"""
+
+    def __init__(self, length, slowing):
+        self.length = length
+        self.bars = 0
+        # (bar number, price) pairs with decreasing highs and increasing lows
+        self.highs = deque()
+        self.lows = deque()
+        self.d = StreamingSMA(slowing)
+
+    def update(self, high, low, close):
+        """Adds new bar and returns current %K and %D"""
+
+        _push_extreme(self.highs, self.bars, high, lambda kept, new: kept <= new)
+        _push_extreme(self.lows, self.bars, low, lambda kept, new: kept >= new)
+        self.bars += 1
+        for extremes in (self.highs, self.lows):
+            if extremes[0][0] <= self.bars - 1 - self.length:
+                extremes.popleft()
+
+        if self.bars < self.length:
+            return np.nan, np.nan
+
+        highest, lowest = self.highs[0][1], self.lows[0][1]
+        k = (close - lowest) * 100 / (highest - lowest) if highest != lowest else np.nan
+
+        return k, self.d.update(k)
+
+
+class StreamingEMA:
+    """Exponential moving average updated one value at a time"""
+
+    def __init__(self, span):
+        self.alpha = 2 / (span + 1)
+        self.value = None
+
+    def update(self, value):
+        """Adds new value and returns current average"""
+
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+
+        return self.value
+
+
+class StreamingMACD:
+    """MACD updated one bar at a time"""
+
+    def __init__(self, fast_span, slow_span):
+        self.fast = StreamingEMA(fast_span)
+        self.slow = StreamingEMA(slow_span)
+
+    def update(self, close):
+        """Adds new close price and returns current fast EMA, slow EMA and MACD"""
+
+        fast = self.fast.update(close)
+        slow = self.slow.update(close)
+
+        return fast, slow, fast - slow
+
+
+def _push_extreme(extremes, bar, price, dominated):
+    """Appends price to monotonic queue, dropping kept prices which can no longer be the window extreme"""
+
+    while extremes and dominated(extremes[-1][1], price):
+        extremes.pop()
+    extremes.append((bar, price))
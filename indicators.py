@@ -1,176 +1,147 @@
-import yfinance as yf
-import datetime
-from datetime import date, timedelta
+import numpy as np
 import plotly.graph_objects as go
 from dash import dcc
 
+from downsampling import downsample_traces, lttb_indices, line_points
+
+from indicator_engine import (
+    memoized,
+    sma_many,
+    bollinger_bands_many,
+    stochastic,
+    macd,
+)
+
 BG_COLOR = "#211F32"
+# Every next moving average gets next color, every next bollinger bands length next line style
+MA_COLORS = ["blue", "orange", "yellow", "cyan", "magenta", "white"]
+BB_DASHES = ["solid", "dash", "dot", "dashdot"]
 
 
-def add_moving_average(
-    ma_length, ticker, fig_data, ticker_value, interval_value, start_date, end_date
+def indicators_warm_up(
+    ma_length=None, bb_length=None, st_length=None, slowing=None, slow_ema=None
 ):
-    """Based on provided settings calculates and adds moving average indicator to the graph"""
-
-    ticker2 = yf.download(
-        tickers=ticker_value,
-        interval=interval_value,
-        start=(
-            datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
-            - timedelta(days=(ma_length + 10))
-        ),
-        end=end_date,
-        prepost=False,
-        threads=True,
-    )
-    if ticker2.empty:
-        ticker["Moving Average"] = ticker["Close"].rolling(window=ma_length).mean()
-    else:
-        ticker2["Moving Average"] = ticker2["Close"].rolling(window=ma_length).mean()
-        row_diff = len(ticker2) - len(ticker)
-        ticker2 = ticker2[row_diff:]
-        ticker = ticker2
-        ticker = ticker.reset_index()
-    fig_data.append(
-        go.Scatter(
-            x=ticker.index,
-            y=ticker["Moving Average"],
-            mode="lines",
-            name="Moving Average",
-            line=dict(color="blue"),
+    """Returns number of bars needed before the visible range, so every selected indicator is fully calculated from its first visible bar"""
+
+    warm_up = [0]
+    if ma_length:
+        warm_up.append(ma_length)
+    if bb_length:
+        warm_up.append(bb_length)
+    if st_length:
+        warm_up.append(st_length + (slowing or 0))
+    # EMA never fully forgets its start, three spans are enough for it to settle
+    if slow_ema:
+        warm_up.append(3 * slow_ema)
+
+    return max(warm_up)
+
+
+def add_moving_average(ma_lengths, ticker, fig_data, history):
+    """Based on provided settings calculates and adds moving averages of all provided lengths to the graph"""
+
+    moving_averages = memoized(sma_many, [history["Close"].to_numpy()], ma_lengths)
+    x = np.arange(len(ticker))
+    for i, ma_length in enumerate(ma_lengths):
+        fig_data.append(
+            go.Scatter(
+                x=x,
+                y=moving_averages[i, -len(ticker) :],
+                mode="lines",
+                name=f"Moving Average ({ma_length})",
+                line=dict(color=MA_COLORS[i % len(MA_COLORS)]),
+            )
         )
-    )
 
 
-def add_bollinger_bands(
-    bb_length,
-    std_dev,
-    ticker,
-    fig_data,
-    ticker_value,
-    interval_value,
-    start_date,
-    end_date,
-):
-    """Based on provided settings calculates and adds bollinger bands indicator to the graph"""
+def add_bollinger_bands(bb_lengths, std_devs, ticker, fig_data, history):
+    """Based on provided settings calculates and adds bollinger bands of all provided lengths and standard deviations to the graph"""
 
-    ticker2 = yf.download(
-        tickers=ticker_value,
-        interval=interval_value,
-        start=(
-            datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
-            - timedelta(days=(bb_length + 10))
-        ),
-        end=end_date,
-        prepost=False,
-        threads=True,
-    )
-    if ticker2.empty:
-        ticker["TP"] = (ticker["Close"] + ticker["Low"] + ticker["High"]) / 3
-        ticker["STD"] = ticker["TP"].rolling(window=bb_length).std(ddof=0)
-        ticker["MA-TP"] = ticker["TP"].rolling(window=bb_length).mean()
-        ticker["BB Up"] = ticker["MA-TP"] + std_dev * ticker["STD"]
-        ticker["BB Down"] = ticker["MA-TP"] - std_dev * ticker["STD"]
-    else:
-        ticker2["TP"] = (ticker2["Close"] + ticker2["Low"] + ticker2["High"]) / 3
-        ticker2["STD"] = ticker2["TP"].rolling(window=bb_length).std(ddof=0)
-        ticker2["MA-TP"] = ticker2["TP"].rolling(window=bb_length).mean()
-        ticker2["BB Up"] = ticker2["MA-TP"] + std_dev * ticker2["STD"]
-        ticker2["BB Down"] = ticker2["MA-TP"] - std_dev * ticker2["STD"]
-        row_diff = len(ticker2) - len(ticker)
-        ticker2 = ticker2[row_diff:]
-        ticker = ticker2
-        ticker = ticker.reset_index()
-    fig_data.append(
-        go.Scatter(
-            x=ticker.index,
-            y=ticker["BB Up"],
-            mode="lines",
-            name="BB Up",
-            line=dict(color="green"),
-        )
+    bb_up, ma_tp, bb_down = memoized(
+        bollinger_bands_many,
+        [
+            history["High"].to_numpy(),
+            history["Low"].to_numpy(),
+            history["Close"].to_numpy(),
+        ],
+        bb_lengths,
+        std_devs,
     )
-
-    fig_data.append(
-        go.Scatter(
-            x=ticker.index,
-            y=ticker["MA-TP"],
-            mode="lines",
-            name="MA-TP",
-            line=dict(color="blue"),
+    x = np.arange(len(ticker))
+    for i, bb_length in enumerate(bb_lengths):
+        dash = BB_DASHES[i % len(BB_DASHES)]
+        for j, std_dev in enumerate(std_devs):
+            fig_data.append(
+                go.Scatter(
+                    x=x,
+                    y=bb_up[i, j, -len(ticker) :],
+                    mode="lines",
+                    name=f"BB Up ({bb_length}, {std_dev})",
+                    line=dict(color="green", dash=dash),
+                )
+            )
+
+        fig_data.append(
+            go.Scatter(
+                x=x,
+                y=ma_tp[i, -len(ticker) :],
+                mode="lines",
+                name=f"MA-TP ({bb_length})",
+                line=dict(color="blue", dash=dash),
+            )
         )
-    )
 
-    fig_data.append(
-        go.Scatter(
-            x=ticker.index,
-            y=ticker["BB Down"],
-            mode="lines",
-            name="BB Down",
-            line=dict(color="red"),
+        for j, std_dev in enumerate(std_devs):
+            fig_data.append(
+                go.Scatter(
+                    x=x,
+                    y=bb_down[i, j, -len(ticker) :],
+                    mode="lines",
+                    name=f"BB Down ({bb_length}, {std_dev})",
+                    line=dict(color="red", dash=dash),
+                )
+            )
+
+
+def add_stochastic(st_length, slowing, ticker, history, xaxis, width=None):
+    """Based on provided settings calculates and adds stochastic indicator to the graph, reduced to the number of points fitting chart width"""
+
+    k, d = (
+        line[-len(ticker) :]
+        for line in memoized(
+            stochastic,
+            [
+                history["High"].to_numpy(),
+                history["Low"].to_numpy(),
+                history["Close"].to_numpy(),
+            ],
+            st_length,
+            slowing,
         )
     )
-
-
-def add_stochastic(
-    st_length,
-    slowing,
-    ticker,
-    ticker_value,
-    interval_value,
-    start_date,
-    end_date,
-    xaxis,
-):
-    """Based on provided settings calculates and adds stochastic indicator to the graph"""
-
-    ticker2 = yf.download(
-        tickers=ticker_value,
-        interval=interval_value,
-        start=(
-            datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
-            - timedelta(days=(st_length + 10))
-        ),
-        end=end_date,
-        prepost=False,
-        threads=True,
-    )
-
-    if ticker2.empty:
-        length_high = ticker["High"].rolling(st_length).max()
-        length_low = ticker["Low"].rolling(st_length).min()
-        ticker["%K"] = (ticker["Close"] - length_low) * 100 / (length_high - length_low)
-        ticker["%D"] = ticker["%K"].rolling(slowing).mean()
-    else:
-        length_high = ticker2["High"].rolling(st_length).max()
-        length_low = ticker2["Low"].rolling(st_length).min()
-        ticker2["%K"] = (
-            (ticker2["Close"] - length_low) * 100 / (length_high - length_low)
-        )
-        ticker2["%D"] = ticker2["%K"].rolling(slowing).mean()
-        row_diff = len(ticker2) - len(ticker)
-        ticker2 = ticker2[row_diff:]
-        ticker = ticker2
-    ticker = ticker.reset_index()
+    dates = history.index[-len(ticker) :]
 
     fig2 = (
         dcc.Graph(
             id="stochastic_chart",
             figure=go.Figure(
-                data=[
-                    go.Scatter(
-                        x=ticker.iloc[:, 0],
-                        y=ticker["%K"],
-                        name="%K",
-                        line=dict(color="#3ad1b8"),
-                    ),
-                    go.Scatter(
-                        x=ticker.iloc[:, 0],
-                        y=ticker["%D"],
-                        name="%D",
-                        line=dict(color="magenta"),
-                    ),
-                ],
+                data=downsample_traces(
+                    [
+                        go.Scatter(
+                            x=dates,
+                            y=k,
+                            name="%K",
+                            line=dict(color="#3ad1b8"),
+                        ),
+                        go.Scatter(
+                            x=dates,
+                            y=d,
+                            name="%D",
+                            line=dict(color="magenta"),
+                        ),
+                    ],
+                    width,
+                ),
                 layout=go.Layout(
                     showlegend=False,
                     yaxis=dict(
@@ -200,44 +171,21 @@ def add_stochastic(
     return fig2
 
 
-def add_macd(
-    fast_ema,
-    slow_ema,
-    ticker,
-    ticker_value,
-    interval_value,
-    start_date,
-    end_date,
-    xaxis,
-):
-    """Based on provided settings calculates and adds MACD indicator to the graph"""
+def add_macd(fast_ema, slow_ema, ticker, history, xaxis, width=None):
+    """Based on provided settings calculates and adds MACD indicator to the graph, reduced to the number of points fitting chart width"""
 
-    ticker2 = yf.download(
-        tickers=ticker_value,
-        interval=interval_value,
-        start=(
-            datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
-            - timedelta(days=(slow_ema + 10))
-        ),
-        end=end_date,
-        prepost=False,
-        threads=True,
+    fast, slow, macd_line = (
+        line[-len(ticker) :]
+        for line in memoized(
+            macd, [history["Close"].to_numpy()], fast_ema, slow_ema
+        )
     )
-
-    if ticker2.empty:
-        ticker["Fast EMA"] = ticker["Close"].ewm(span=fast_ema, adjust=False).mean()
-        ticker["Slow EMA"] = ticker["Close"].ewm(span=slow_ema, adjust=False).mean()
-        ticker["MACD"] = ticker["Fast EMA"] - ticker["Slow EMA"]
-    else:
-        ticker2["Fast EMA"] = ticker2["Close"].ewm(span=fast_ema, adjust=False).mean()
-        ticker2["Slow EMA"] = ticker2["Close"].ewm(span=slow_ema, adjust=False).mean()
-        ticker2["MACD"] = ticker2["Fast EMA"] - ticker2["Slow EMA"]
-        row_diff = len(ticker2) - len(ticker)
-        ticker2 = ticker2[row_diff:]
-        ticker = ticker2
-    ticker = ticker.reset_index()
-    macd_positive = ticker.loc[ticker["MACD"] >= 0]
-    macd_negative = ticker.loc[ticker["MACD"] < 0]
+    dates = history.index[-len(ticker) :]
+    # Histogram keeps only bars picked by LTTB, so there are no more bars than pixels
+    bars = lttb_indices(macd_line, line_points(width))
+    bar_dates = dates[bars]
+    bar_values = macd_line[bars]
+    positive = bar_values >= 0
 
     fig3 = dcc.Graph(
         id="macd_chart",
@@ -245,32 +193,27 @@ def add_macd(
             data=[
                 # Use different colors for positive and negative values
                 go.Bar(
-                    x=macd_positive.iloc[:, 0],
-                    y=macd_positive["MACD"],
+                    x=bar_dates[positive],
+                    y=bar_values[positive],
                     name="MACD",
                     yaxis="y1",
                     marker=dict(color="yellow"),
                 ),
                 go.Bar(
-                    x=macd_negative.iloc[:, 0],
-                    y=macd_negative["MACD"],
+                    x=bar_dates[~positive],
+                    y=bar_values[~positive],
                     name="MACD",
                     yaxis="y1",
                     marker=dict(color="orange"),
                 ),
-                go.Scatter(
-                    x=ticker.iloc[:, 0],
-                    y=ticker["Fast EMA"],
-                    name="Fast EMA",
-                    yaxis="y2",
-                ),
-                go.Scatter(
-                    x=ticker.iloc[:, 0],
-                    y=ticker["Slow EMA"],
-                    name="Slow EMA",
-                    yaxis="y2",
-                ),
-            ],
+            ]
+            + downsample_traces(
+                [
+                    go.Scatter(x=dates, y=fast, name="Fast EMA", yaxis="y2",),
+                    go.Scatter(x=dates, y=slow, name="Slow EMA", yaxis="y2",),
+                ],
+                width,
+            ),
             layout=go.Layout(
                 yaxis1=dict(
                     autorange=True, tickfont=dict(color="white"), gridcolor="gray",
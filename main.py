@@ -1,21 +1,27 @@
+import os
+import uuid
 import datetime
 from datetime import date, timedelta
 
 import dash
+import diskcache
 import dash_bootstrap_components as dbc
+from dash import DiskcacheManager
 from dash import dash_table
 from dash import dcc
 from dash import html
-from dash.dependencies import Input, Output, State
+from dash.dependencies import ClientsideFunction, Input, Output, State
 
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-import yfinance as yf
-from yahooquery import Ticker
-from find_image import find_logo
+from market_data import DATA_DIR, get_price_data, warm_up_start
+from providers import get_provider
+from sessions import submit_search, abandon_if_superseded
+from symbols import validate_symbol, suggest_symbols
 
 from radar_ratings import (
+    get_fundamentals,
     value_rating,
     debt_rating,
     stability_rating,
@@ -24,38 +30,98 @@ from radar_ratings import (
 )
 
 from utils import (
+    fetch_concurrently,
     add_indicator_button,
     prepare_price_statistics,
     get_linear_regression_params,
+    get_rolling_regression,
     get_percentage_returns_statistics,
-    format_table_data,
+    get_financial_statement,
+    get_close_prices,
+    parse_parameter_list,
+    load_chart_data,
+    price_trace,
     prepare_distribution_and_price_data,
     prepare_summary_tab_data,
-    historical_and_parametric_var_and_cvar,
     datatable_settings_multiindex,
     monte_carlo_simulation,
+    monte_carlo_fan_chart_data,
     monte_carlo_statistics,
 )
 
-from indicators import add_moving_average, add_bollinger_bands, add_stochastic, add_macd
+from risk_engine import var_and_cvar, rolling_historical_var_and_cvar
+from downsampling import downsample_trace, downsample_traces
+
+from indicators import (
+    indicators_warm_up,
+    add_moving_average,
+    add_bollinger_bands,
+    add_stochastic,
+    add_macd as add_macd_chart,
+)
 
 # Declaring constant variables
 INTERVALS = ["1d", "1m", "1mo", "1wk", "3mo", "5m", "15m", "30m", "60m", "90m"]
 INDICATORS = ["Moving average", "Bollinger Bands", "MACD", "Stochastic"]
+DISTRIBUTION_BINS = [
+    {"label": "Freedman–Diaconis", "value": "fd"},
+    {"label": "Scott", "value": "scott"},
+    {"label": "50 bins", "value": 50},
+]
 ticker = pd.DataFrame(columns=["Datetime", "Open", "High", "Low", "Close", "Adj Close"])
 TODAY_DATE = pd.Timestamp.now()
 WEEK_AGO = pd.to_datetime(datetime.datetime.now() - timedelta(weeks=1))
 GREEN = "#00b51a"
 RED = "#ff2d21"
+# Also set in assets/clientside.js, which styles indicator buttons in the browser
 BG_COLOR = "#211F32"
+# Seconds to wait for each piece of the header, logo is optional
+HEADER_TIMEOUTS = {"info": 10, "price": 10, "history": 10, "logo": 3}
+# Number of simulated prices above which Monte Carlo runs in single precision
+MC_FLOAT32_THRESHOLD = 10_000_000
+MC_PERCENTILES = (5, 25, 50, 75, 95)
+# Chart inputs after which the whole chart is drawn again, other ones only patch the drawn figure
+CHART_DATA_INPUTS = {
+    "search",
+    "interval_dropdown",
+    "chart_date_picker",
+    "chart_width",
+}
+MC_SAMPLE_PATHS = 20
+MC_BAND_COLORS = ["rgba(58,209,184,0.2)", "rgba(58,209,184,0.4)"]
+VAR_CONFIDENCE_LEVELS = [0.95, 0.99, 0.999]
+# Rolling VaR chart: number of bars in the window and confidence levels drawn
+VAR_WINDOW = 100
+VAR_CHART_LEVELS = [0.95, 0.99]
+VAR_CHART_COLORS = ["#3ad1b8", "orange"]
+# Colors of up, down and flat streaks on the streak lengths chart
+STREAK_COLORS = {"Up": "#3ad1b8", "Down": "magenta", "Flat": "grey"}
+# Benchmarks (ETFs tracking the index) selectable on the statistics tab
+BENCHMARKS = {
+    "SPY": "S&P500",
+    "QQQ": "Nasdaq 100",
+    "DIA": "Dow Jones",
+    "IWM": "Russell 2000",
+}
+# Default number of bars in rolling beta, alpha and correlation window
+BETA_WINDOW = 60
+# Long running callbacks (statistics, Monte Carlo) are run as jobs in separate processes, outside web workers
+JOBS_DIR = os.path.join(DATA_DIR, "jobs")
+# Styles of progress bars and cancel buttons while their job is running and when it is not
+PROGRESS_SHOWN = {"display": "flex", "margin": "10px auto", "maxWidth": "700px"}
+BUTTON_SHOWN = {"display": "inline-block"}
+HIDDEN = {"display": "none"}
+
+background_callback_manager = DiskcacheManager(diskcache.Cache(JOBS_DIR))
 
 app = dash.Dash(
     external_stylesheets=[dbc.themes.BOOTSTRAP, "assets/styles.css"],
     suppress_callback_exceptions=True,
+    background_callback_manager=background_callback_manager,
 )
 
 # Main layout
-app.layout = html.Div(
+main_layout = html.Div(
     id="main_container",
     className="main-container",
     children=[
@@ -72,12 +138,16 @@ app.layout = html.Div(
             style={"text-align": "center", "color": "white"},
         ),
         html.Div(
-            dcc.Input(
-                id="input_ticker".format("search"),
-                type="search",
-                placeholder="Type ticker".format("search"),
-                className="search-bar",
-            ),
+            [
+                dcc.Input(
+                    id="input_ticker".format("search"),
+                    type="search",
+                    placeholder="Type ticker and press Enter".format("search"),
+                    className="search-bar",
+                    list="ticker_suggestions",
+                ),
+                html.Datalist(id="ticker_suggestions", children=[]),
+            ],
             style={"display": "flex", "justify-content": "center",},
         ),
         html.Div(id="short_info_container", children=[],),
@@ -130,18 +200,65 @@ app.layout = html.Div(
 )
 
 
+def serve_layout():
+    """Returns main layout together with unique id of the browser session, used to abandon work for tickers replaced by a newer search"""
+
+    return html.Div(
+        children=[
+            dcc.Store(id="session_id", data=str(uuid.uuid4())),
+            # Searched ticker with number increasing with every search, set in the browser only after pressing Enter or picking a suggestion
+            dcc.Store(id="search", data={"ticker": None, "number": 0}),
+            main_layout,
+        ]
+    )
+
+
+app.layout = serve_layout
+
+
+# SEARCH
+app.clientside_callback(
+    ClientsideFunction("tickery", "submitSearch"),
+    Output("search", "data"),
+    Input("input_ticker", "n_submit"),
+    Input("input_ticker", "value"),
+    State("ticker_suggestions", "children"),
+    State("search", "data"),
+    prevent_initial_call=True,
+)
+
+
 # SHORT INFO
 
 
+@app.callback(
+    Output("ticker_suggestions", "children"), Input("input_ticker", "value"),
+)
+def show_suggestions(ticker_text):
+    """Suggests tickers from local symbol directory starting with already typed text, typing itself doesn't search for the ticker"""
+
+    if not ticker_text:
+        return []
+
+    return [
+        html.Option(value=symbol, label=name)
+        for symbol, name in suggest_symbols(ticker_text)
+    ]
+
+
 @app.callback(
     Output("welcome_message", "children"),
     Output("welcome_message", "style"),
     Output("main_tabs", "style"),
     Output("short_info_container", "children"),
-    Input("input_ticker", "value"),
+    Input("search", "data"),
+    State("session_id", "data"),
 )
-def show_info(ticker_text):
-    """Displaying basic data of stock based on provided ticker"""
+def show_info(search, session_id):
+    """Displaying basic data of stock based on provided ticker, also the only place remembering the latest search of the session"""
+
+    ticker_text = search["ticker"]
+    submit_search(session_id, search["number"])
 
     empty = "Nothing is here yet, type stock ticker to start"
     not_found = "We couldn't find your ticker :( Correct it and try again"
@@ -156,26 +273,37 @@ def show_info(ticker_text):
 
     # Validation of ticker - returning according communicates
     if ticker_text:
-        ticker = yf.Ticker(ticker_text)
-        ticker_yq = Ticker(ticker_text, validate=True)
-        validation = ticker_yq.symbols
+        provider = get_provider()
+        validation = validate_symbol(ticker_text)
     else:
         return empty, style, {"display": "none"}, None
 
-    if validation == []:
+    if not validation:
         return not_found, style, {"display": "none"}, None
 
-    # Collecting the data
-    name = ticker.info["shortName"]
-    currency = ticker.info["currency"]
-    logo_url = find_logo(ticker_text)
-    industry = (ticker.info["industry"]).replace("—", " ")
-    exchange = ticker_yq.price[ticker_text]["exchangeName"]
+    # Collecting the data at once, unless user has already searched for another ticker
+    abandon_if_superseded(session_id, search["number"])
+    header_data = fetch_concurrently(
+        {
+            "info": lambda: provider.info(ticker_text),
+            "price": lambda: provider.price(ticker_text),
+            "history": lambda: get_price_data(ticker_text, "1d", period="1mo"),
+            "logo": lambda: provider.logo_url(ticker_text),
+        },
+        HEADER_TIMEOUTS,
+        optional=["logo"],
+    )
+    info = header_data["info"]
+    name = info["shortName"]
+    currency = info["currency"]
+    logo_url = header_data["logo"]
+    industry = (info["industry"]).replace("—", " ")
+    exchange = header_data["price"]["exchangeName"]
     if exchange == "NasdaqGS":
         exchange = "Nasdaq"
-    history = ticker.history(period="1m")
+    history = header_data["history"]
     last_price = round(history["Close"].iloc[-1], 2)
-    prev_close = round(ticker.info["previousClose"], 2)
+    prev_close = round(info["previousClose"], 2)
     change = round(last_price - prev_close, 2)
 
     # Change of price change labels colors whether is it up or down
@@ -196,6 +324,7 @@ def show_info(ticker_text):
             children=[
                 dbc.Row(
                     [
+                        # Header is rendered without logo if it wasn't found in time
                         dbc.Col(
                             [
                                 html.Img(
@@ -203,7 +332,9 @@ def show_info(ticker_text):
                                     alt="image",
                                     className="logo-img",
                                 )
-                            ],
+                            ]
+                            if logo_url
+                            else [],
                             className="logo-column",
                         ),
                         dbc.Col(
@@ -250,11 +381,12 @@ def show_info(ticker_text):
 @app.callback(
     Output("tabs_content", "children"),
     Input("main_tabs", "value"),
-    Input("input_ticker", "value"),
+    Input("search", "data"),
 )
-def render_tab(tab, ticker_text):
+def render_tab(tab, search):
     """Displays content depending on selected tab"""
 
+    ticker_text = search["ticker"]
     if ticker_text == "":
         return None
     # Summary
@@ -334,7 +466,15 @@ def render_tab(tab, ticker_text):
                     id="modals",
                     children=[
                         add_indicator_button(
-                            "ma", "Moving average", "", "Period", 0, 0, "none", "none",
+                            "ma",
+                            "Moving average",
+                            "",
+                            "Period",
+                            0,
+                            0,
+                            "none",
+                            "none",
+                            multiple_values=True,
                         ),
                         add_indicator_button(
                             "bb",
@@ -345,6 +485,7 @@ def render_tab(tab, ticker_text):
                             0,
                             "display",
                             "none",
+                            multiple_values=True,
                         ),
                         add_indicator_button(
                             "st",
@@ -372,6 +513,10 @@ def render_tab(tab, ticker_text):
                 html.Div(
                     id="stats_container", children=[], className="modals-and-stats",
                 ),
+                # Numbers of moving average and bollinger bands traces drawn after the price trace
+                dcc.Store(id="chart_overlays", data={"ma": 0, "bb": 0}),
+                # Width of the chart in pixels, measured in the browser
+                dcc.Store(id="chart_width"),
                 dcc.Graph(
                     id="ticker_cndl_chart",
                     figure=go.Figure(
@@ -507,6 +652,32 @@ def render_tab(tab, ticker_text):
                                     placeholder="Interval",
                                     className="interval-dropdown-s",
                                 ),
+                                dcc.Dropdown(
+                                    options=DISTRIBUTION_BINS,
+                                    value="fd",
+                                    clearable=False,
+                                    id="bins_dropdown_s",
+                                    className="interval-dropdown-s",
+                                ),
+                                dcc.Dropdown(
+                                    options=[
+                                        {"label": name, "value": benchmark}
+                                        for benchmark, name in BENCHMARKS.items()
+                                    ],
+                                    value="SPY",
+                                    clearable=False,
+                                    id="benchmark_dropdown_s",
+                                    className="interval-dropdown-s",
+                                ),
+                                dcc.Input(
+                                    id="beta_window_input",
+                                    type="number",
+                                    min=2,
+                                    value=BETA_WINDOW,
+                                    debounce=True,
+                                    placeholder="Rolling window",
+                                    className="interval-dropdown-s",
+                                ),
                             ],
                             className="interval-dd-stat",
                         ),
@@ -521,6 +692,22 @@ def render_tab(tab, ticker_text):
                             ),
                             style={"display": "flex", "justify-content": "center"},
                         ),
+                        dbc.Progress(
+                            id="statistics_progress",
+                            value=0,
+                            striped=True,
+                            animated=True,
+                            style=HIDDEN,
+                        ),
+                        html.Div(
+                            dbc.Button(
+                                "Cancel",
+                                id="cancel_statistics_button",
+                                color="secondary",
+                                style=HIDDEN,
+                            ),
+                            style={"display": "flex", "justify-content": "center"},
+                        ),
                     ],
                     style={"margin-bottom": "40px"},
                 ),
@@ -533,18 +720,20 @@ def render_tab(tab, ticker_text):
 # SUMMARY TAB
 @app.callback(
     Output("summary_container", "children", allow_duplicate=True),
-    [Input("input_ticker", "value"), Input("main_tabs", "value"),],
+    [Input("search", "data"), Input("main_tabs", "value"),],
+    State("session_id", "data"),
     prevent_initial_call=True,
 )
-def update_summary(ticker_text, tab):
+def update_summary(search, tab, session_id):
     """Returns content for  Summary tab based on provided ticker: simple price chart, radar chart and some statistics"""
 
+    ticker_text = search["ticker"]
     if ticker_text == "":
         return None
 
-    validation = Ticker(ticker_text, validate=True).symbols
-    if validation == []:
+    if not validate_symbol(ticker_text):
         return None
+    abandon_if_superseded(session_id, search["number"])
 
     current_year = int(TODAY_DATE.strftime("%Y"))
     if tab == "summary_tab" and ticker_text is not None:
@@ -609,11 +798,13 @@ def update_summary(ticker_text, tab):
         )
 
         # Calculating rates for company condition radar chart
-        value = value_rating(ticker_text)
-        debt = debt_rating(ticker_text)
+        abandon_if_superseded(session_id, search["number"])
+        fundamentals = get_fundamentals(ticker_text)
+        value = value_rating(fundamentals)
+        debt = debt_rating(fundamentals)
         stability = stability_rating(price_data)
-        dividend = dividend_rating(ticker_text)
-        future = future_rating(ticker_text)
+        dividend = dividend_rating(fundamentals)
+        future = future_rating(fundamentals)
 
         # Formatting chart color depending on company condition
         ratings = [value, debt, stability, dividend, future]
@@ -690,12 +881,14 @@ def update_summary(ticker_text, tab):
         Output("infos_container", "children"),
     ],
     Input("range_slider", "value"),
-    [State("price_graph_col", "children"), State("input_ticker", "value")],
+    [State("price_graph_col", "children"), State("search", "data")],
     State("infos_container", "children"),
 )
-def update_simple_chart(year, graph, ticker_text, infos):
+def update_simple_chart(year, graph, search, infos):
     """Updates simple price chart and basic price statistics based on range slider value, also limits range slider range"""
 
+    ticker_text = search["ticker"]
+
     # Block first dot of rangeslider to always remains as current year
     if year[1] != 4:
         return graph, [year[0], 4], infos
@@ -766,7 +959,8 @@ def update_simple_chart(year, graph, ticker_text, infos):
 # CHART TAB
 
 
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction("tickery", "showIndicatorModal"),
     [
         Output("ma_modal", "is_open", allow_duplicate=True),
         Output("bb_modal", "is_open", allow_duplicate=True),
@@ -776,178 +970,48 @@ def update_simple_chart(year, graph, ticker_text, infos):
     Input("indicator_dropdown", "value"),
     prevent_initial_call=True,
 )
-def show_indicator_modal(indicator_value):
-    """Displays modal window for input of indicator settings"""
-
-    if indicator_value == "Moving average":
-        return True, False, False, False
-    elif indicator_value == "Bollinger Bands":
-        return False, True, False, False
-    elif indicator_value == "Stochastic":
-        return False, False, True, False
-    elif indicator_value == "MACD":
-        return False, False, False, True
-    else:
-        return False, False, False, False
-
-
-@app.callback(
-    [
-        Output("indicator_dropdown", "value", allow_duplicate=True),
-        Output("ma_button", "style", allow_duplicate=True),
-        Output("ma_x_button", "style", allow_duplicate=True),
-    ],
-    Input("ma_ok", "n_clicks"),
-    prevent_initial_call=True,
-)
-def add_ma(n_clicks):
-    """After confirming settings in modal window, clears indicator dropdown and adds moving button and its clear button"""
 
-    if n_clicks != None:
-        n_clicks = None
-        return (
-            None,
-            {
-                "display": "flex",
-                "margin-right": "0px",
-                "padding": "5px",
-                "background-color": BG_COLOR,
-                "font-size": "12px",
-            },
-            {
-                "display": "flex",
-                "margin-left": "0px",
-                "padding": "5px",
-                "background-color": BG_COLOR,
-                "font-size": "12px",
-            },
-        )
-
-
-@app.callback(
-    [
-        Output("indicator_dropdown", "value", allow_duplicate=True),
-        Output("bb_button", "style", allow_duplicate=True),
-        Output("bb_x_button", "style", allow_duplicate=True),
-    ],
-    Input("bb_ok", "n_clicks"),
-    prevent_initial_call=True,
-)
-def add_bb(n_clicks):
-    """After confirming settings in modal window, clears indicator dropdown and adds bollinger bands button and its clear button"""
-
-    if n_clicks != None:
-        n_clicks = None
-        return (
-            None,
-            {
-                "display": "flex",
-                "margin-right": "0px",
-                "padding": "5px",
-                "background-color": BG_COLOR,
-                "font-size": "12px",
-            },
-            {
-                "display": "flex",
-                "margin-left": "0px",
-                "padding": "5px",
-                "background-color": BG_COLOR,
-                "font-size": "12px",
-            },
-        )
+for indicator in ["ma", "bb", "st", "macd"]:
+    app.clientside_callback(
+        ClientsideFunction("tickery", "showIndicatorButtons"),
+        [
+            Output("indicator_dropdown", "value", allow_duplicate=True),
+            Output(f"{indicator}_button", "style", allow_duplicate=True),
+            Output(f"{indicator}_x_button", "style", allow_duplicate=True),
+        ],
+        Input(f"{indicator}_ok", "n_clicks"),
+        prevent_initial_call=True,
+    )
 
 
-@app.callback(
-    [
-        Output("indicator_dropdown", "value", allow_duplicate=True),
-        Output("st_button", "style", allow_duplicate=True),
-        Output("st_x_button", "style", allow_duplicate=True),
-    ],
-    Input("st_ok", "n_clicks"),
-    prevent_initial_call=True,
+app.clientside_callback(
+    ClientsideFunction("tickery", "chartWidth"),
+    Output("chart_width", "data"),
+    Input("ticker_cndl_chart", "id"),
+    State("chart_width", "data"),
 )
-def add_st(n_clicks):
-    """After confirming settings in modal window, clears indicator dropdown and adds stochastic button and its clear button"""
-
-    if n_clicks != None:
-        return (
-            None,
-            {
-                "display": "flex",
-                "margin-right": "0px",
-                "padding": "5px",
-                "background-color": BG_COLOR,
-                "font-size": "12px",
-            },
-            {
-                "display": "flex",
-                "margin-left": "0px",
-                "padding": "5px",
-                "background-color": BG_COLOR,
-                "font-size": "12px",
-            },
-        )
-
-
-@app.callback(
-    [
-        Output("indicator_dropdown", "value", allow_duplicate=True),
-        Output("macd_button", "style", allow_duplicate=True),
-        Output("macd_x_button", "style", allow_duplicate=True),
-    ],
-    Input("macd_ok", "n_clicks"),
-    prevent_initial_call=True,
-)
-def add_macd(n_clicks):
-    """After confirming settings in modal window, clears indicator dropdown and adds MACD button and its clear button"""
-
-    if n_clicks != None:
-        return (
-            None,
-            {
-                "display": "flex",
-                "margin-right": "0px",
-                "padding": "5px",
-                "background-color": BG_COLOR,
-                "font-size": "12px",
-            },
-            {
-                "display": "flex",
-                "margin-left": "0px",
-                "padding": "5px",
-                "background-color": BG_COLOR,
-                "font-size": "12px",
-            },
-        )
 
 
 # CHART BUTTONS PART
 
-# Moving Average
-@app.callback(Output("ma_modal", "is_open"), Input("ma_button", "n_clicks"))
-def show_ma_modal(n_clicks):
-    """Shows modal window again after clicking moving average button"""
-    if n_clicks != None:
-        n_clicks = None
-        return True
-    else:
-        return False
-
+# Modals are shown again after clicking indicator button
+for indicator in ["ma", "bb", "st", "macd"]:
+    app.clientside_callback(
+        ClientsideFunction("tickery", "showModal"),
+        Output(f"{indicator}_modal", "is_open"),
+        Input(f"{indicator}_button", "n_clicks"),
+    )
 
-@app.callback(
+# Moving Average
+app.clientside_callback(
+    ClientsideFunction("tickery", "updateMaLabel"),
     [Output("ma_button", "n_clicks"), Output("ma_button", "children")],
     Input("ma_ok", "n_clicks"),
     [State("ma_param1", "value"), State("ma_button", "children")],
 )
-def update_indicator(n_clicks, indicator_param1, indicator_name):
-    """Updates indiactor settings"""
-    if n_clicks != None:
-        button_value = f"{indicator_name[:14]}({indicator_param1})"
-        n_clicks = None
-        return None, button_value
 
-
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction("tickery", "deleteIndicatorButtons"),
     [
         Output("ma_button", "style"),
         Output("ma_x_button", "style"),
@@ -956,24 +1020,11 @@ def update_indicator(n_clicks, indicator_param1, indicator_name):
     Input("ma_x_button", "n_clicks"),
     prevent_initial_call=True,
 )
-def delete_ma_buttons(n_clicks):
-    """After clicking "X" button, deletes indicator from chart, indicator button and clear button"""
-    if n_clicks != None:
-        return {"display": "none"}, {"display": "none"}, None
 
 
 # Bollinger Bands
-@app.callback(Output("bb_modal", "is_open"), Input("bb_button", "n_clicks"))
-def show_bb_modal(n_clicks):
-    """Shows modal window again after clicking bollinger bands button"""
-    if n_clicks != None:
-        n_clicks = None
-        return True
-    else:
-        return False
-
-
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction("tickery", "updateBbLabel"),
     [Output("bb_button", "n_clicks"), Output("bb_button", "children")],
     Input("bb_ok", "n_clicks"),
     [
@@ -982,15 +1033,9 @@ def show_bb_modal(n_clicks):
         State("bb_button", "children"),
     ],
 )
-def update_indicator(n_clicks, indicator_param1, indicator_param2, indicator_name):
-    """Updates indiactor settings"""
-    if n_clicks != None:
-        button_value = f"{indicator_name[:15]}({indicator_param1}, {indicator_param2})"
-        n_clicks = None
-        return None, button_value
 
-
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction("tickery", "deleteIndicatorButtons"),
     [
         Output("bb_button", "style"),
         Output("bb_x_button", "style"),
@@ -999,24 +1044,11 @@ def update_indicator(n_clicks, indicator_param1, indicator_param2, indicator_nam
     Input("bb_x_button", "n_clicks"),
     prevent_initial_call=True,
 )
-def delete_bb_buttons(n_clicks):
-    """After clicking "X" button, deletes indicator from chart, indicator button and clear button"""
-    if n_clicks != None:
-        return {"display": "none"}, {"display": "none"}, None
 
 
 # Stochastic
-@app.callback(Output("st_modal", "is_open"), Input("st_button", "n_clicks"))
-def show_st_modal(n_clicks):
-    """Shows modal window again after clicking stochastic button"""
-    if n_clicks != None:
-        n_clicks = None
-        return True
-    else:
-        return False
-
-
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction("tickery", "updateStLabel"),
     [Output("st_button", "n_clicks"), Output("st_button", "children"),],
     Input("st_ok", "n_clicks"),
     [
@@ -1025,15 +1057,9 @@ def show_st_modal(n_clicks):
         State("st_button", "children"),
     ],
 )
-def update_indicator(n_clicks, indicator_param1, indicator_param2, indicator_name):
-    """Updates indiactor settings"""
-    if n_clicks != None:
-        button_value = f"{indicator_name[:10]}({indicator_param1}, {indicator_param2})"
-        n_clicks = None
-        return None, button_value
-
 
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction("tickery", "deleteIndicatorPanel"),
     [
         Output("st_button", "style"),
         Output("st_x_button", "style"),
@@ -1043,25 +1069,11 @@ def update_indicator(n_clicks, indicator_param1, indicator_param2, indicator_nam
     Input("st_x_button", "n_clicks"),
     prevent_initial_call=True,
 )
-def delete_st(n_clicks):
-    """After clicking "X" button, deletes indicator from chart, indicator button and clear button"""
-    if n_clicks != None:
-        n_clicks = None
-        return {"display": "none"}, {"display": "none"}, [], None
 
 
 # MACD
-@app.callback(Output("macd_modal", "is_open"), Input("macd_button", "n_clicks"))
-def show_macd_modal(n_clicks):
-    """Shows modal window again after clicking MACD button"""
-    if n_clicks != None:
-        n_clicks = None
-        return True
-    else:
-        return False
-
-
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction("tickery", "updateMacdLabel"),
     [Output("macd_button", "n_clicks"), Output("macd_button", "children"),],
     Input("macd_ok", "n_clicks"),
     [
@@ -1070,15 +1082,9 @@ def show_macd_modal(n_clicks):
         State("macd_button", "children"),
     ],
 )
-def update_indicator(n_clicks, indicator_param1, indicator_param2, indicator_name):
-    """Updates indiactor settings"""
-    if n_clicks != None:
-        button_value = f"{indicator_name[:4]}({indicator_param1}, {indicator_param2})"
-        n_clicks = None
-        return None, button_value
-
 
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction("tickery", "deleteIndicatorPanel"),
     [
         Output("macd_button", "style"),
         Output("macd_x_button", "style"),
@@ -1088,11 +1094,6 @@ def update_indicator(n_clicks, indicator_param1, indicator_param2, indicator_nam
     Input("macd_x_button", "n_clicks"),
     prevent_initial_call=True,
 )
-def delete_macd(n_clicks):
-    """After clicking "X" button, deletes indicator from chart, indicator button and clear button"""
-    if n_clicks != None:
-        n_clicks = None
-        return {"display": "none"}, {"display": "none"}, [], None
 
 
 # UPDATING CHART
@@ -1103,9 +1104,10 @@ def delete_macd(n_clicks):
         Output("stoch_container", "children", allow_duplicate=True),
         Output("macd_container", "children", allow_duplicate=True),
         Output("stats_container", "children"),
+        Output("chart_overlays", "data"),
     ],
     [
-        Input("input_ticker", "value"),
+        Input("search", "data"),
         Input("interval_dropdown", "value"),
         Input("chart_date_picker", "start_date"),
         Input("chart_date_picker", "end_date"),
@@ -1115,6 +1117,7 @@ def delete_macd(n_clicks):
         Input("macd_ok", "n_clicks"),
         Input("scale_dropdown", "value"),
         Input("type_dropdown", "value"),
+        Input("chart_width", "data"),
     ],
     State("ma_param1", "value"),
     State("bb_param2", "value"),
@@ -1123,11 +1126,12 @@ def delete_macd(n_clicks):
     State("st_param2", "value"),
     State("macd_param1", "value"),
     State("macd_param2", "value"),
-    State("ticker_cndl_chart", "figure"),
+    State("chart_overlays", "data"),
+    State("session_id", "data"),
     prevent_initial_call=True,
 )
 def update_chart(
-    ticker_value,
+    search,
     interval_value,
     start_date,
     end_date,
@@ -1137,6 +1141,7 @@ def update_chart(
     macd_ok,
     scale,
     type,
+    chart_width,
     ma_length,
     bb_length,
     bb_std,
@@ -1144,28 +1149,119 @@ def update_chart(
     st_slowing,
     fast_ema,
     slow_ema,
-    init_figure,
+    overlays,
+    session_id,
 ):
-    """Draws charts based on the multiple settings provided by user"""
-    stoch = []
-    macd = []
+    """Draws charts based on the multiple settings provided by user.
+
+    Only new ticker, interval or dates redraw the whole chart, other settings send just the changed traces or layout properties"""
 
+    ticker_value = search["ticker"]
     if ticker_value is None or interval_value is None or start_date is None:
-        return init_figure, False, stoch, macd, None
-
-    ticker = yf.download(
-        tickers=ticker_value,
-        interval=interval_value,
-        start=start_date,
-        end=end_date,
-        prepost=False,
-        threads=True,
+        return dash.no_update, False, [], [], None, dash.no_update
+
+    triggered = set(dash.ctx.triggered_prop_ids.values())
+    redraw = bool(triggered & CHART_DATA_INPUTS)
+    panels_changed = redraw or bool(triggered & {"st_ok", "macd_ok"})
+
+    # Switching scale changes only a layout property, no price data is needed
+    if triggered == {"scale_dropdown"}:
+        figure = dash.Patch()
+        figure["layout"]["yaxis"]["type"] = scale
+        return (
+            figure,
+            dash.no_update,
+            dash.no_update,
+            dash.no_update,
+            dash.no_update,
+            dash.no_update,
+        )
+
+    # Moving averages and bollinger bands accept comma separated lists of parameters
+    ma_lengths = parse_parameter_list(ma_length) if ma_ok is not None else []
+    bb_lengths = parse_parameter_list(bb_length) if bb_ok is not None else []
+    bb_std_devs = parse_parameter_list(bb_std, float) if bb_ok is not None else []
+    if not bb_std_devs:
+        bb_lengths = []
+
+    # Downloading price data once, with enough bars before start date for all selected indicators
+    warm_up = indicators_warm_up(
+        ma_length=max(ma_lengths, default=None),
+        bb_length=max(bb_lengths, default=None),
+        st_length=st_length if st_ok is not None else None,
+        slowing=st_slowing if st_ok is not None else None,
+        slow_ema=slow_ema if macd_ok is not None else None,
     )
+    history, ticker = load_chart_data(
+        ticker_value, interval_value, start_date, end_date, warm_up
+    )
+    abandon_if_superseded(session_id, search["number"])
 
     if ticker.empty:
-        return init_figure, True, stoch, macd, None
+        if redraw:
+            return dash.no_update, True, [], [], None, dash.no_update
+        return (
+            dash.no_update,
+            True,
+            dash.no_update,
+            dash.no_update,
+            dash.no_update,
+            dash.no_update,
+        )
 
-    ticker = ticker.reset_index()
+    # Moving averages are drawn right after price, bollinger bands after them
+    ma_traces = []
+    if ma_lengths and (redraw or "ma_ok" in triggered):
+        add_moving_average(ma_lengths, ticker, ma_traces, history)
+    bb_traces = []
+    if bb_lengths and (redraw or "bb_ok" in triggered):
+        add_bollinger_bands(bb_lengths, bb_std_devs, ticker, bb_traces, history)
+    # Long ranges are reduced to about as many points as the chart has pixels
+    ma_traces = downsample_traces(ma_traces, chart_width)
+    bb_traces = downsample_traces(bb_traces, chart_width)
+
+    # Stochastic and MACD are drawn below the chart, x axis labels are moved to the bottom one
+    stoch = dash.no_update
+    macd = dash.no_update
+    if panels_changed:
+        stoch = []
+        if st_ok is not None:
+            stoch = add_stochastic(
+                st_length, st_slowing, ticker, history, macd_ok is None, chart_width
+            )
+        macd = []
+        if macd_ok is not None:
+            macd = add_macd_chart(
+                fast_ema, slow_ema, ticker, history, True, chart_width
+            )
+    show_ticklabels = st_ok is None and macd_ok is None
+
+    if not redraw:
+        figure = dash.Patch()
+        if "scale_dropdown" in triggered:
+            figure["layout"]["yaxis"]["type"] = scale
+        if "type_dropdown" in triggered:
+            figure["data"][0] = downsample_trace(
+                price_trace(ticker, type), chart_width
+            )
+        # Overlays of unchanged indicators stay drawn with the settings they were confirmed with
+        drawn = dict(overlays)
+        if "ma_ok" in triggered:
+            for i in range(drawn["ma"], 0, -1):
+                del figure["data"][i]
+            for i, trace in enumerate(ma_traces):
+                figure["data"].insert(1 + i, trace)
+            drawn["ma"] = len(ma_traces)
+        if "bb_ok" in triggered:
+            first_bb = 1 + drawn["ma"]
+            for i in range(first_bb + drawn["bb"] - 1, first_bb - 1, -1):
+                del figure["data"][i]
+            figure["data"].extend(bb_traces)
+            drawn["bb"] = len(bb_traces)
+        if panels_changed:
+            figure["layout"]["xaxis"]["showticklabels"] = show_ticklabels
+
+        return figure, False, stoch, macd, dash.no_update, drawn
 
     # Stats
     stats = prepare_price_statistics(ticker)
@@ -1181,109 +1277,14 @@ def update_chart(
     # Converting x-axis labels based on interval (date type)
     if ticker.columns[0] == "Datetime":
         ticktext = [str(val)[:19] for val in ticker.iloc[tick_indices, 0]]
-        # Dropping last row beacuse it is called incorrectly for some reason
-        if str(ticker.iloc[-1, 0])[:19] != str(ticker.iloc[-2, 0])[:19]:
-            ticker = ticker[:-1]
-
     else:
         ticktext = [str(val)[:10] for val in ticker.iloc[tick_indices, 0]]
 
-    # Creating figure based on provided chart type
-    if type == "candlesticks":
-        fig_data = [
-            go.Candlestick(
-                x=ticker.index,
-                open=ticker["Open"],
-                high=ticker["High"],
-                low=ticker["Low"],
-                close=ticker["Close"],
-            )
-        ]
-    elif type == "bars":
-        fig_data = [
-            go.Ohlc(
-                x=ticker.index,
-                open=ticker["Open"],
-                high=ticker["High"],
-                low=ticker["Low"],
-                close=ticker["Close"],
-            )
-        ]
-    else:
-        fig_data = [go.Scatter(x=ticker.index, y=ticker["Close"],)]
-
-    # Add moving average to the plot if selected
-    if ma_ok != None:
-        add_moving_average(
-            ma_length,
-            ticker,
-            fig_data,
-            ticker_value,
-            interval_value,
-            start_date,
-            end_date,
-        )
-    # Add bollinger bands to the plot if selected
-    if bb_ok != None:
-        add_bollinger_bands(
-            bb_length,
-            bb_std,
-            ticker,
-            fig_data,
-            ticker_value,
-            interval_value,
-            start_date,
-            end_date,
-        )
-    # Add stochastic to the plot if selected
-    if st_ok is not None:
-        stoch = add_stochastic(
-            st_length,
-            st_slowing,
-            ticker,
-            ticker_value,
-            interval_value,
-            start_date,
-            end_date,
-            macd_ok is None,
-        )
-    else:
-        stoch = []
-
-    # Add MACD to the plot if selected
-    if macd_ok is not None:
-        macd = add_macd(
-            fast_ema,
-            slow_ema,
-            ticker,
-            ticker_value,
-            interval_value,
-            start_date,
-            end_date,
-            True,
-        )
-    else:
-        macd = []
-
-    # Moving x axis labels to the bottom of all charts
-    if st_ok != None or macd_ok != None:
-        xaxis = {
-            "showticklabels": False,
-            "gridcolor": "grey",
-            "tickfont": {"color": "white"},
-        }
-    else:
-        xaxis = {
-            "tickmode": "array",
-            "tickvals": tick_values,
-            "ticktext": ticktext,
-            "gridcolor": "grey",
-            "tickfont": {"color": "white"},
-        }
-
     # Constructing final figure
     fig = go.Figure(
-        data=fig_data,
+        data=[downsample_trace(price_trace(ticker, type), chart_width)]
+        + ma_traces
+        + bb_traces,
         layout=go.Layout(
             showlegend=False,
             titlefont=dict(color="white"),
@@ -1295,43 +1296,58 @@ def update_chart(
                 gridcolor="grey",
             ),
             xaxis_rangeslider_visible=False,
-            xaxis=xaxis,
+            xaxis={
+                "showticklabels": show_ticklabels,
+                "tickmode": "array",
+                "tickvals": tick_values,
+                "ticktext": ticktext,
+                "gridcolor": "grey",
+                "tickfont": {"color": "white"},
+            },
             margin=go.layout.Margin(l=40, r=40, b=5, t=5,),
             paper_bgcolor="rgba(0,0,0,0)",
             plot_bgcolor="rgba(0,0,0,0)",
         ),
     )
 
-    return fig, False, stoch, macd, stats
+    return (
+        fig,
+        False,
+        stoch,
+        macd,
+        stats,
+        {"ma": len(ma_traces), "bb": len(bb_traces)},
+    )
 
 
 # FINANCIALS TAB
 @app.callback(
     Output("financials_container", "children"),
     [
-        Input("input_ticker", "value"),
+        Input("search", "data"),
         Input("main_tabs", "value"),
         Input("financials_sub_tab", "value"),
         Input("qora_tabs", "value"),
     ],
+    State("session_id", "data"),
 )
-def update_financials(ticker_text, tab1, tab2, tab3):
+def update_financials(search, tab1, tab2, tab3, session_id):
     """Returns table with financial data of selected settings"""
 
+    ticker_text = search["ticker"]
     if tab1 == "financials_tab":
-        ticker = Ticker(ticker_text)
         if tab3 == "annual_tab":
             frequency = "a"
         elif tab3 == "quarterly_tab":
             frequency = "q"
         if tab2 == "balance_sheet_tab":
-            table_data = ticker.balance_sheet(frequency)
+            statement = "balance_sheet"
         elif tab2 == "income_stmt_tab":
-            table_data = ticker.income_statement(frequency)
+            statement = "income_statement"
         elif tab2 == "cash_flow_tab":
-            table_data = ticker.cash_flow(frequency)
-
-        table_data = format_table_data(table_data, frequency)
+            statement = "cash_flow"
+        table_data = get_financial_statement(ticker_text, statement, frequency)
+        abandon_if_superseded(session_id, search["number"])
 
         initial_active_cell = {"row": 0, "column": 0, "column_id": "0", "row_id": 0}
 
@@ -1412,35 +1428,76 @@ def cell_clicked(active_cell, table):
     Output("statistics_container2", "children"),
     Output("error_alert_s", "is_open"),
     [
-        Input("input_ticker", "value"),
+        Input("search", "data"),
         Input("main_tabs", "value"),
         Input("start_datepicker", "date"),
         Input("end_datepicker", "date"),
         Input("interval_dropdown_s", "value"),
+        Input("bins_dropdown_s", "value"),
+        Input("benchmark_dropdown_s", "value"),
+        Input("beta_window_input", "value"),
+    ],
+    State("session_id", "data"),
+    background=True,
+    running=[
+        (Output("statistics_progress", "style"), PROGRESS_SHOWN, HIDDEN),
+        (Output("cancel_statistics_button", "style"), BUTTON_SHOWN, HIDDEN),
     ],
+    progress=[
+        Output("statistics_progress", "value"),
+        Output("statistics_progress", "label"),
+    ],
+    cancel=[Input("cancel_statistics_button", "n_clicks")],
 )
-def update_statistics(ticker_text, tab, start_date, end_date, interval):
+def update_statistics(
+    set_progress,
+    search,
+    tab,
+    start_date,
+    end_date,
+    interval,
+    bins,
+    benchmark,
+    beta_window,
+    session_id,
+):
     """Loads graphs and statistics of stock into statistics tab container, based on ticker and time range provided by user"""
+    ticker_text = search["ticker"]
     if tab == "statistics_tab":
 
         if None in (ticker_text, start_date, end_date, interval):
             return None, False
 
+        set_progress((5, "Loading prices"))
         data_for_distribution_and_price_charts = prepare_distribution_and_price_data(
-            ticker_text, interval, start_date, end_date
+            ticker_text, interval, start_date, end_date, bins
         )
         price_data = data_for_distribution_and_price_charts["Price data"]
         x_values = data_for_distribution_and_price_charts["x values"]
         distribution_data = data_for_distribution_and_price_charts["Distribution data"]
 
+        abandon_if_superseded(session_id, search["number"])
+        set_progress((25, "Comparing with benchmark"))
         linear_regression_params = get_linear_regression_params(
-            ticker_text, interval, start_date, end_date
+            ticker_text, interval, start_date, end_date, benchmark
         )
         returns = linear_regression_params["Returns"]
         correlation = linear_regression_params["Correlation"]
         trend = linear_regression_params["Trend"]
+        rolling_regression = get_rolling_regression(
+            ticker_text,
+            interval,
+            start_date,
+            end_date,
+            beta_window if beta_window and beta_window >= 2 else BETA_WINDOW,
+            benchmark,
+        ).reindex(price_data.index)
 
+        abandon_if_superseded(session_id, search["number"])
+        set_progress((50, "Calculating returns statistics"))
         percentage_returns_statistics = get_percentage_returns_statistics(price_data)
+        streak_lengths = percentage_returns_statistics.pop("Streak lengths")
+        streak_returns = percentage_returns_statistics.pop("Average streak return")
 
         stats_list = []
 
@@ -1456,6 +1513,36 @@ def update_statistics(ticker_text, tab, start_date, end_date, interval):
             children=stats_list, className="returns-stats-container"
         )
 
+        # Streak lengths chart, average return of streaks of every length shown on hover
+        streak_fig = dcc.Graph(
+            id="streak-lengths-chart",
+            className="percentage-returns-chart",
+            figure={
+                "data": [
+                    {
+                        "type": "bar",
+                        "x": streak_lengths.index,
+                        "y": streak_lengths[direction],
+                        "customdata": streak_returns[direction],
+                        "name": direction,
+                        "marker": {"color": STREAK_COLORS[direction]},
+                        "hovertemplate": "%{y} streaks, average return %{customdata:.2f}%",
+                    }
+                    for direction in streak_lengths.columns
+                ],
+                "layout": go.Layout(
+                    title="Streak lengths",
+                    titlefont={"color": "white"},
+                    xaxis={"color": "white", "title": "Candles", "dtick": 1},
+                    yaxis={"color": "white", "title": "Streaks"},
+                    legend={"font": {"color": "white"}},
+                    plot_bgcolor=BG_COLOR,
+                    paper_bgcolor=BG_COLOR,
+                    margin=go.layout.Margin(r=0, t=25, b=25, l=0),
+                ),
+            },
+        )
+
         # Linear regression chart
         linear_regression_fig = dcc.Graph(
             id="linear_regression_chart",
@@ -1464,14 +1551,14 @@ def update_statistics(ticker_text, tab, start_date, end_date, interval):
                 "data": [
                     {
                         "name": ticker_text,
-                        "x": returns["SPY"],
-                        "y": returns[ticker_text],
+                        "x": returns["Benchmark"],
+                        "y": returns["Stock"],
                         "mode": "markers",
                         "marker": {"color": "#3ad1b8"},
                     },
                     {
                         "name": "Trend",
-                        "x": returns[ticker_text],
+                        "x": returns["Benchmark"],
                         "y": trend,
                         "marker": {"color": "magenta"},
                     },
@@ -1480,8 +1567,8 @@ def update_statistics(ticker_text, tab, start_date, end_date, interval):
                     "title": "Linear regression",
                     "titlefont": {"color": "white"},
                     "legend": {"font": {"color": "white"}},
-                    "xaxis": {"color": "white", "title": ticker_text},
-                    "yaxis": {"color": "white", "title": "S&P500"},
+                    "xaxis": {"color": "white", "title": BENCHMARKS[benchmark]},
+                    "yaxis": {"color": "white", "title": ticker_text},
                     "plot_bgcolor": BG_COLOR,
                     "paper_bgcolor": BG_COLOR,
                 },
@@ -1521,7 +1608,8 @@ def update_statistics(ticker_text, tab, start_date, end_date, interval):
                     {
                         "x": distribution_data.index,
                         "y": distribution_data["Counted returns"],
-                        "type": "histogram",
+                        "width": distribution_data["Bin width"],
+                        "type": "bar",
                         "marker": {"color": "#3ad1b8"},
                     }
                 ],
@@ -1538,33 +1626,15 @@ def update_statistics(ticker_text, tab, start_date, end_date, interval):
         )
 
         # VaR and CVaR data
-        var = historical_and_parametric_var_and_cvar(price_data)
-        data = {
-            ("VaR (%)", "Historical"): [
-                var["Historical"]["VaR"]["95"],
-                var["Historical"]["VaR"]["99"],
-                var["Historical"]["VaR"]["99.9"],
-            ],
-            ("VaR (%)", "Parametric"): [
-                var["Parametric"]["VaR"]["95"],
-                var["Parametric"]["VaR"]["99"],
-                var["Parametric"]["VaR"]["99.9"],
-            ],
-            ("CVaR (%)", "Historical"): [
-                var["Historical"]["CVaR"]["95"],
-                var["Historical"]["CVaR"]["99"],
-                var["Historical"]["CVaR"]["99.9"],
-            ],
-            ("CVaR (%)", "Parametric"): [
-                var["Parametric"]["CVaR"]["95"],
-                var["Parametric"]["CVaR"]["99"],
-                var["Parametric"]["CVaR"]["99.9"],
-            ],
-        }
-
-        # Convert data to DataFrame
-        df = pd.DataFrame(data)
-        df.index = ["95%", "99%", "99.9%"]
+        set_progress((75, "Calculating VaR"))
+        returns = price_data["Close"].pct_change().dropna()
+        df = (var_and_cvar(returns, VAR_CONFIDENCE_LEVELS) * 100).round(2)
+        df.columns = pd.MultiIndex.from_tuples(
+            [(f"{measure} (%)", method) for measure, method in df.columns]
+        )
+        # Cornish-Fisher values are missing when its expansion doesn't fit the returns
+        df = df.astype(object).where(df.notna(), "n/a")
+        df.index = [f"{level * 100:g}%" for level in VAR_CONFIDENCE_LEVELS]
         df.index.name = "Confidence level"
 
         df.reset_index(inplace=True)
@@ -1594,6 +1664,103 @@ def update_statistics(ticker_text, tab, start_date, end_date, interval):
             style_data={"minHeight": "50px",},
         )
 
+        # Rolling VaR chart, with enough bars before start date to fill the first window
+        var_prices = get_close_prices(
+            ticker_text,
+            interval,
+            warm_up_start(start_date, interval, VAR_WINDOW + 1, end_date),
+            end_date,
+        )
+        # Without bars before start date the first window fills later
+        if var_prices.empty:
+            var_prices = price_data["Close"]
+        var_returns = var_prices.pct_change().dropna()
+        rolling_var, rolling_cvar = rolling_historical_var_and_cvar(
+            var_returns.to_numpy(), VAR_WINDOW, VAR_CHART_LEVELS
+        )
+        var_traces = [
+            {
+                "x": x_values,
+                "y": price_data["Daily returns"],
+                "type": "bar",
+                "name": "Returns",
+                "marker": {"color": "grey"},
+            }
+        ]
+        for i, level in enumerate(VAR_CHART_LEVELS):
+            for measure, values, line_dash in (
+                ("VaR", rolling_var[i], "solid"),
+                ("CVaR", rolling_cvar[i], "dot"),
+            ):
+                var_traces.append(
+                    {
+                        "x": x_values,
+                        "y": pd.Series(values * 100, index=var_returns.index)
+                        .reindex(price_data.index)
+                        .to_numpy(),
+                        "name": f"{measure} {level * 100:g}%",
+                        "line": {"color": VAR_CHART_COLORS[i], "dash": line_dash},
+                    }
+                )
+
+        var_fig = dcc.Graph(
+            id="rolling-var-chart",
+            className="percentage-returns-chart",
+            figure={
+                "data": var_traces,
+                "layout": go.Layout(
+                    title=f"Historical VaR and CVaR ({VAR_WINDOW} bars window)",
+                    titlefont={"color": "white"},
+                    xaxis={"color": "white", "dtick": len(x_values) // 10},
+                    yaxis={"color": "white"},
+                    legend={"font": {"color": "white"}},
+                    plot_bgcolor=BG_COLOR,
+                    paper_bgcolor=BG_COLOR,
+                    margin=go.layout.Margin(r=0, t=25, b=25, l=0),
+                ),
+            },
+        )
+
+        # Rolling beta, alpha and correlation chart
+        rolling_regression_fig = dcc.Graph(
+            id="rolling-beta-chart",
+            className="percentage-returns-chart",
+            figure={
+                "data": [
+                    {
+                        "x": x_values,
+                        "y": rolling_regression["Beta"],
+                        "name": "Beta",
+                        "line": {"color": "#3ad1b8"},
+                    },
+                    {
+                        "x": x_values,
+                        "y": rolling_regression["Correlation"],
+                        "name": "Correlation",
+                        "line": {"color": "magenta"},
+                    },
+                    {
+                        "x": x_values,
+                        "y": rolling_regression["Alpha"] * 100,
+                        "name": "Alpha (%)",
+                        "yaxis": "y2",
+                        "line": {"color": "orange", "dash": "dot"},
+                    },
+                ],
+                "layout": go.Layout(
+                    title=f"Rolling beta, alpha and correlation with {BENCHMARKS[benchmark]}",
+                    titlefont={"color": "white"},
+                    xaxis={"color": "white", "dtick": len(x_values) // 10},
+                    yaxis={"color": "white"},
+                    yaxis2={"color": "orange", "overlaying": "y", "side": "right"},
+                    legend={"font": {"color": "white"}},
+                    plot_bgcolor=BG_COLOR,
+                    paper_bgcolor=BG_COLOR,
+                    margin=go.layout.Margin(r=0, t=25, b=25, l=0),
+                ),
+            },
+        )
+
         # Monte Carlo
         simulations_traces = []
 
@@ -1672,6 +1839,30 @@ def update_statistics(ticker_text, tab, start_date, end_date, interval):
                                                     className="simulated-period-input",
                                                     placeholder="Simulated period",
                                                 ),
+                                                dcc.Input(
+                                                    id="mc_seed_input",
+                                                    type="number",
+                                                    min=0,
+                                                    step=1,
+                                                    className="simulated-period-input",
+                                                    placeholder="Seed (optional)",
+                                                ),
+                                                dcc.Dropdown(
+                                                    options=[
+                                                        {
+                                                            "label": "Percentiles",
+                                                            "value": "fan",
+                                                        },
+                                                        {
+                                                            "label": "All paths",
+                                                            "value": "paths",
+                                                        },
+                                                    ],
+                                                    value="fan",
+                                                    clearable=False,
+                                                    id="mc_render_mode_dropdown",
+                                                    className="simulated-period-input",
+                                                ),
                                                 html.Div(
                                                     dbc.Button(
                                                         "Run simulation",
@@ -1679,10 +1870,23 @@ def update_statistics(ticker_text, tab, start_date, end_date, interval):
                                                         className="run-simulation-button",
                                                     )
                                                 ),
+                                                dbc.Button(
+                                                    "Cancel",
+                                                    id="mc_cancel_button",
+                                                    color="secondary",
+                                                    style=HIDDEN,
+                                                ),
                                             ],
                                         ),
                                     ],
                                 ),
+                                dbc.Progress(
+                                    id="mc_progress",
+                                    value=0,
+                                    striped=True,
+                                    animated=True,
+                                    style=HIDDEN,
+                                ),
                                 monte_carlo_graph,
                             ],
                         ),
@@ -1696,7 +1900,7 @@ def update_statistics(ticker_text, tab, start_date, end_date, interval):
                             children=[
                                 html.H5(
                                     children=[
-                                        f"Correlation with S&P500 index: {round(correlation.iloc[0, 1],2)}"
+                                        f"Correlation with {BENCHMARKS[benchmark]} index: {round(correlation.iloc[0, 1],2)}"
                                     ],
                                     className="correlation-label",
                                 )
@@ -1717,6 +1921,9 @@ def update_statistics(ticker_text, tab, start_date, end_date, interval):
                     ],
                 ),
                 html.Div(className="stat-2-div", children=percentage_returns_fig),
+                html.Div(className="stat-2-div", children=var_fig),
+                html.Div(className="stat-2-div", children=rolling_regression_fig),
+                html.Div(className="stat-2-div", children=streak_fig),
                 html.Div(className="stat-2-div", children=stats_container,),
             ],
         )
@@ -1733,43 +1940,118 @@ def update_statistics(ticker_text, tab, start_date, end_date, interval):
     Input("mc_run_simulation_button", "n_clicks"),
     State("mc_no_simulations_input", "value"),
     State("mc_simulated_period_input", "value"),
-    State("input_ticker", "value"),
+    State("search", "data"),
     State("start_datepicker", "date"),
     State("end_datepicker", "date"),
     State("interval_dropdown_s", "value"),
+    State("mc_seed_input", "value"),
+    State("mc_render_mode_dropdown", "value"),
+    background=True,
+    running=[
+        (Output("mc_run_simulation_button", "disabled"), True, False),
+        (Output("mc_progress", "style"), PROGRESS_SHOWN, HIDDEN),
+        (Output("mc_cancel_button", "style"), BUTTON_SHOWN, HIDDEN),
+    ],
+    progress=[Output("mc_progress", "value"), Output("mc_progress", "label")],
+    cancel=[Input("mc_cancel_button", "n_clicks")],
 )
 def run_simulation(
+    set_progress,
     n_clicks,
     number_of_simulations,
     simulated_period,
-    ticker,
+    search,
     start_date,
     end_date,
     interval,
+    seed,
+    render_mode,
 ):
     """Utilizing the given simulation count and period, the Python function conducts a Monte Carlo simulation. The results are graphed, and key statistics are computed and presented, offering insights into the simulation's outcome."""
 
     if n_clicks is None:
         return None
     else:
+        set_progress((5, "Loading prices"))
         data_for_distribution_and_price_charts = prepare_distribution_and_price_data(
-            ticker, interval, start_date, end_date
+            search["ticker"], interval, start_date, end_date
         )
         price_data = data_for_distribution_and_price_charts["Price data"]
         initial_price = price_data["Close"].iloc[-1]
+        number_of_simulations = int(number_of_simulations)
+        simulated_period = int(simulated_period)
+        # Only non-negative whole numbers are used as seed, otherwise simulation isn't seeded
+        seed = int(seed) if isinstance(seed, (int, float)) and seed >= 0 else None
+        set_progress((20, "Simulating"))
         monte_carlo_data = monte_carlo_simulation(
-            price_data, int(number_of_simulations), int(simulated_period)
+            price_data,
+            number_of_simulations,
+            simulated_period,
+            seed=seed,
+            dtype=np.float32
+            if number_of_simulations * simulated_period > MC_FLOAT32_THRESHOLD
+            else np.float64,
         )
 
-        simulated_prices = []
+        set_progress((70, "Drawing chart"))
         simulated_traces = []
 
-        # Collecting traces and prices into the lists
-        for simulation in range(int(number_of_simulations)):
-            prices = monte_carlo_data[:, simulation]
-            trace = go.Scatter(y=prices, mode="lines")
-            simulated_prices.append(prices)
-            simulated_traces.append(trace)
+        if render_mode == "paths":
+            # Collecting traces of every simulation into the list
+            for simulation in range(number_of_simulations):
+                prices = monte_carlo_data[:, simulation]
+                trace = go.Scatter(y=prices, mode="lines")
+                simulated_traces.append(trace)
+        else:
+            # Percentile bands and a few sample paths, independent of number of simulations
+            fan_chart_data = monte_carlo_fan_chart_data(
+                monte_carlo_data,
+                MC_PERCENTILES,
+                MC_SAMPLE_PATHS,
+                seed=seed,
+            )
+            bands = fan_chart_data["Percentiles"]
+            sample_paths = fan_chart_data["Sample paths"]
+            for simulation in range(sample_paths.shape[1]):
+                simulated_traces.append(
+                    go.Scatter(
+                        y=sample_paths[:, simulation],
+                        mode="lines",
+                        line={"color": "grey", "width": 0.5},
+                        hoverinfo="skip",
+                    )
+                )
+            for band in range(len(MC_PERCENTILES) // 2):
+                lower = MC_PERCENTILES[band]
+                upper = MC_PERCENTILES[-band - 1]
+                simulated_traces.append(
+                    go.Scatter(
+                        y=bands[lower],
+                        mode="lines",
+                        line={"width": 0},
+                        name=f"{lower}th percentile",
+                    )
+                )
+                simulated_traces.append(
+                    go.Scatter(
+                        y=bands[upper],
+                        mode="lines",
+                        line={"width": 0},
+                        fill="tonexty",
+                        fillcolor=MC_BAND_COLORS[band % len(MC_BAND_COLORS)],
+                        name=f"{upper}th percentile",
+                    )
+                )
+            if len(MC_PERCENTILES) % 2:
+                median = MC_PERCENTILES[len(MC_PERCENTILES) // 2]
+                simulated_traces.append(
+                    go.Scatter(
+                        y=bands[median],
+                        mode="lines",
+                        line={"color": "#3ad1b8", "width": 2},
+                        name="Median",
+                    )
+                )
 
         # Updating chart figure with simulated traces
         fig = go.Figure(
@@ -1798,7 +2080,7 @@ def run_simulation(
             ),
         )
 
-        monte_carlo_stats = monte_carlo_statistics(simulated_prices, initial_price)
+        monte_carlo_stats = monte_carlo_statistics(monte_carlo_data, initial_price)
 
         monte_carlo_stats_list = []
 
@@ -0,0 +1,267 @@
+import os
+import json
+import math
+import threading
+import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cache import DATA_DIR, cached, shared_lock
+from providers import get_provider
+
+# Declaring constant variables
+STORE_DIR = os.path.join(DATA_DIR, "prices")
+COVERAGE_KEY = b"tickery_coverage"
+# Trading days covered by a single bar of each interval (6.5 trading hours a day)
+INTERVAL_TRADING_DAYS = {
+    "1m": 1 / 390,
+    "5m": 5 / 390,
+    "15m": 15 / 390,
+    "30m": 30 / 390,
+    "60m": 60 / 390,
+    "90m": 90 / 390,
+    "1d": 1,
+    "1wk": 5,
+    "1mo": 21,
+    "3mo": 63,
+}
+# Bars of monthly intervals are counted in calendar months
+INTERVAL_MONTHS = {"1mo": 1, "3mo": 3}
+# Calendar days per trading day (conservative 250 trading days a year), plus days for holidays and long weekends around the warm-up
+CALENDAR_DAYS_PER_TRADING_DAY = 365 / 250
+WARM_UP_MARGIN_DAYS = 5
+# Yahoo serves intraday bars only this many days back, 1m bars also at most 7 days in one request
+INTRADAY_LOOKBACK_DAYS = {
+    "1m": 30,
+    "5m": 60,
+    "15m": 60,
+    "30m": 60,
+    "60m": 730,
+    "90m": 60,
+}
+INTRADAY_REQUEST_DAYS = {"1m": 7}
+# How long intraday bars stay fresh while the market is open (in seconds)
+INTRADAY_TTL = {
+    "1m": 30,
+    "5m": 60,
+    "15m": 180,
+    "30m": 300,
+    "60m": 300,
+    "90m": 300,
+}
+MARKET_TIMEZONE = "America/New_York"
+MARKET_OPEN = datetime.time(9, 30)
+MARKET_CLOSE = datetime.time(16, 0)
+# Seconds after which lock of a stored file held by a killed process is released
+STORE_LOCK_TIMEOUT = 120
+
+
+def period_to_start(period, today=None):
+    """Converts yfinance style period (e.g. "5d", "3mo", "1y") to the start date of that period"""
+
+    today = pd.Timestamp(today or datetime.date.today()).normalize()
+    if period.endswith("mo"):
+        return today - pd.DateOffset(months=int(period[:-2]))
+    elif period.endswith("wk"):
+        return today - pd.DateOffset(weeks=int(period[:-2]))
+    elif period.endswith("y"):
+        return today - pd.DateOffset(years=int(period[:-1]))
+    elif period.endswith("d"):
+        return today - pd.DateOffset(days=int(period[:-1]))
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def warm_up_start(start_date, interval, bars, end_date=None, today=None):
+    """Returns date early enough to include provided number of bars before start date, taking weekends and holidays into account.
+
+    Without warm-up bars start date is returned unchanged, and intraday warm-up never reaches past the range Yahoo serves
+    (counted back from today, and for 1m bars also from end date), so the visible range alone can always be downloaded"""
+
+    start = pd.Timestamp(start_date).normalize()
+    if not bars:
+        return start
+
+    if interval in INTERVAL_MONTHS:
+        padded = start - pd.DateOffset(months=bars * INTERVAL_MONTHS[interval])
+    else:
+        trading_days = bars * INTERVAL_TRADING_DAYS.get(interval, 1)
+        padded = start - pd.Timedelta(
+            days=math.ceil(trading_days * CALENDAR_DAYS_PER_TRADING_DAY)
+        )
+    padded -= pd.Timedelta(days=WARM_UP_MARGIN_DAYS)
+
+    if interval in INTRADAY_LOOKBACK_DAYS:
+        today = pd.Timestamp(today or datetime.date.today()).normalize()
+        # A day of slack, as Yahoo counts the lookback from the current time
+        earliest = today - pd.Timedelta(days=INTRADAY_LOOKBACK_DAYS[interval] - 1)
+        if interval in INTRADAY_REQUEST_DAYS:
+            end = (
+                pd.Timestamp(end_date).normalize()
+                if end_date is not None
+                else today + pd.Timedelta(days=1)
+            )
+            earliest = max(
+                earliest, end - pd.Timedelta(days=INTRADAY_REQUEST_DAYS[interval])
+            )
+        padded = max(padded, earliest)
+
+    return min(padded, start)
+
+
+def trim_warm_up(data, start_date):
+    """Returns part of price data starting from provided date, dropping bars downloaded only for indicators warm-up"""
+
+    start = _match_timezone(pd.Timestamp(start_date).normalize(), data.index)
+    return data[data.index >= start]
+
+
+def get_price_data(ticker_text, interval="1d", start=None, end=None, period=None):
+    """Returns OHLC data of provided ticker, served from in-memory cache, then from bars stored on disk and downloading only the missing ones"""
+
+    today = pd.Timestamp(datetime.date.today())
+    if period is not None:
+        start = period_to_start(period, today)
+    start = pd.Timestamp(start).normalize()
+    # yfinance treats end date as exclusive, so by default today is included
+    end = (
+        pd.Timestamp(end).normalize()
+        if end is not None
+        else today + pd.Timedelta(days=1)
+    )
+
+    price_data = cached(
+        ("price data", get_provider().name, ticker_text.upper(), interval, start, end),
+        lambda: _load_price_data(ticker_text, interval, start, end),
+        lambda data: price_data_expiry(interval) if not data.empty else None,
+    )
+
+    # Callers add their own columns, so cached frame is never handed out directly
+    return price_data.copy()
+
+
+def price_data_expiry(interval, now=None):
+    """Returns time (in seconds since epoch) until which price data of provided interval is up to date, based on US market hours"""
+
+    now = pd.Timestamp(now or pd.Timestamp.now(tz=MARKET_TIMEZONE)).tz_convert(
+        MARKET_TIMEZONE
+    )
+
+    if interval in INTRADAY_TTL:
+        if _is_market_open(now):
+            return now.timestamp() + INTRADAY_TTL[interval]
+        return _next_session_time(now, MARKET_OPEN).timestamp()
+
+    return _next_session_time(now, MARKET_CLOSE).timestamp()
+
+
+def _is_market_open(now):
+    """Checks whether US market session is in progress (holidays are not taken into account)"""
+
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def _next_session_time(now, session_time):
+    """Returns the nearest future weekday moment at provided time of the session"""
+
+    # Stepping over wall clock dates, so daylight saving changes don't shift the session time
+    wall_now = now.tz_localize(None)
+    moment = pd.Timestamp.combine(wall_now.date(), session_time)
+    while moment <= wall_now or moment.weekday() >= 5:
+        moment += pd.Timedelta(days=1)
+
+    return moment.tz_localize(now.tz)
+
+
+def _load_price_data(ticker_text, interval, start, end):
+    """Returns OHLC data of provided ticker, reading stored bars from disk and downloading only the missing ones"""
+
+    today = pd.Timestamp(datetime.date.today())
+    path = _store_path(ticker_text, interval)
+    with shared_lock(path, STORE_LOCK_TIMEOUT):
+        stored, coverage = _read_store(path)
+
+        if coverage is None:
+            missing = [(start, end)]
+        else:
+            missing = []
+            if start < coverage[0]:
+                missing.append((start, coverage[0]))
+            if end > coverage[1]:
+                missing.append((coverage[1], end))
+
+        downloaded = [
+            _download(ticker_text, interval, gap_start, gap_end)
+            for gap_start, gap_end in missing
+        ]
+        downloaded = [data for data in downloaded if not data.empty]
+
+        if downloaded:
+            stored = pd.concat(([stored] if stored is not None else []) + downloaded)
+            # Newer download of the same bar (e.g. unfinished candle of today) wins
+            stored = stored[~stored.index.duplicated(keep="last")].sort_index()
+            # Bars of today may still change, so coverage never goes past it
+            covered_end = min(end, today)
+            if coverage is not None:
+                coverage = (min(start, coverage[0]), max(covered_end, coverage[1]))
+            else:
+                coverage = (start, covered_end)
+            _write_store(path, stored, coverage)
+
+    if stored is None:
+        return pd.DataFrame()
+
+    index_start = _match_timezone(start, stored.index)
+    index_end = _match_timezone(end, stored.index)
+    return stored[(stored.index >= index_start) & (stored.index < index_end)].copy()
+
+
+def _download(ticker_text, interval, start, end):
+    """Downloads OHLC data of provided ticker from the market data provider"""
+
+    return get_provider().history(ticker_text, interval, start, end)
+
+
+def _store_path(ticker_text, interval):
+    """Returns path of Parquet file storing bars of provided ticker and interval, separately for each provider"""
+
+    file_name = ticker_text.upper().replace(os.sep, "_")
+    return os.path.join(STORE_DIR, get_provider().name, interval, f"{file_name}.parquet")
+
+
+def _read_store(path):
+    """Reads stored bars and the date range they cover, returns (None, None) if nothing is stored yet"""
+
+    if not os.path.exists(path):
+        return None, None
+
+    table = pq.read_table(path)
+    coverage = json.loads(table.schema.metadata[COVERAGE_KEY])
+    coverage = (pd.Timestamp(coverage[0]), pd.Timestamp(coverage[1]))
+
+    return table.to_pandas(), coverage
+
+
+def _write_store(path, data, coverage):
+    """Atomically writes bars together with the date range they cover"""
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    table = pa.Table.from_pandas(data)
+    metadata = dict(table.schema.metadata or {})
+    metadata[COVERAGE_KEY] = json.dumps([str(coverage[0]), str(coverage[1])])
+    table = table.replace_schema_metadata(metadata)
+
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pq.write_table(table, temp_path)
+    os.replace(temp_path, path)
+
+
+def _match_timezone(timestamp, index):
+    """Localizes naive timestamp to the timezone of intraday index, so both can be compared"""
+
+    tz = getattr(index, "tz", None)
+    if tz is not None and timestamp.tzinfo is None:
+        return timestamp.tz_localize(tz)
+    return timestamp
@@ -0,0 +1,212 @@
+import os
+import sys
+import json
+from abc import ABC, abstractmethod
+
+import pandas as pd
+import yfinance as yf
+from yahooquery import Ticker
+
+from find_image import find_logo
+
+# Declaring constant variables
+STATEMENTS = ["balance_sheet", "income_statement", "cash_flow"]
+FREQUENCIES = ["a", "q"]
+MODULES = ["summaryDetail", "financialData", "defaultKeyStatistics"]
+
+_provider = None
+
+
+class MarketDataProvider(ABC):
+    """Source of all market data used by the app: price history, quote info, fundamentals modules and financial statements"""
+
+    name = None
+
+    @abstractmethod
+    def history(self, ticker_text, interval, start, end):
+        """Returns OHLC data of provided ticker between start (inclusive) and end (exclusive) dates"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def info(self, ticker_text):
+        """Returns dictionary with basic company info (shortName, currency, industry, previousClose...)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def price(self, ticker_text):
+        """Returns dictionary with quote data (exchangeName...)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def validate(self, ticker_text):
+        """Checks whether provided ticker exists"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def modules(self, ticker_text, modules):
+        """Returns dictionary of requested fundamentals modules (e.g. summaryDetail) of provided ticker"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def financial_statement(self, ticker_text, statement, frequency):
+        """Returns financial statement (balance_sheet, income_statement or cash_flow) of provided frequency ("a" or "q")"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def logo_url(self, ticker_text):
+        """Returns url of company logo"""
+        raise NotImplementedError
+
+
+class YahooProvider(MarketDataProvider):
+    """Live data from Yahoo Finance (logos come from TradingView)"""
+
+    name = "yahoo"
+
+    def history(self, ticker_text, interval, start, end):
+        return yf.download(
+            tickers=ticker_text,
+            interval=interval,
+            start=pd.Timestamp(start).date(),
+            end=pd.Timestamp(end).date(),
+            prepost=False,
+            threads=True,
+        )
+
+    def info(self, ticker_text):
+        return yf.Ticker(ticker_text).info
+
+    def price(self, ticker_text):
+        return Ticker(ticker_text).price[ticker_text]
+
+    def validate(self, ticker_text):
+        return Ticker(ticker_text, validate=True).symbols != []
+
+    def modules(self, ticker_text, modules):
+        return Ticker(ticker_text).get_modules(modules)[ticker_text]
+
+    def financial_statement(self, ticker_text, statement, frequency):
+        return getattr(Ticker(ticker_text), statement)(frequency)
+
+    def logo_url(self, ticker_text):
+        return find_logo(ticker_text)
+
+
+class FileProvider(MarketDataProvider):
+    """Recorded data read from local files, see record_market_data for the directory layout"""
+
+    name = "file"
+
+    def __init__(self, root):
+        self.root = root
+
+    def history(self, ticker_text, interval, start, end):
+        path = os.path.join(
+            self.root, "history", interval, f"{ticker_text.upper()}.parquet"
+        )
+        if not os.path.exists(path):
+            return pd.DataFrame()
+
+        data = pd.read_parquet(path)
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if data.index.tz is not None:
+            start = start.tz_localize(data.index.tz)
+            end = end.tz_localize(data.index.tz)
+
+        return data[(data.index >= start) & (data.index < end)]
+
+    def info(self, ticker_text):
+        return self._quote(ticker_text)["info"]
+
+    def price(self, ticker_text):
+        return self._quote(ticker_text)["price"]
+
+    def validate(self, ticker_text):
+        return os.path.exists(self._quote_path(ticker_text))
+
+    def modules(self, ticker_text, modules):
+        recorded = self._quote(ticker_text)["modules"]
+        return {module: recorded[module] for module in modules if module in recorded}
+
+    def financial_statement(self, ticker_text, statement, frequency):
+        path = os.path.join(
+            self.root, "statements", ticker_text.upper(), f"{statement}_{frequency}.parquet"
+        )
+        return pd.read_parquet(path)
+
+    def logo_url(self, ticker_text):
+        return self._quote(ticker_text).get("logo_url")
+
+    def _quote_path(self, ticker_text):
+        return os.path.join(self.root, "quotes", f"{ticker_text.upper()}.json")
+
+    def _quote(self, ticker_text):
+        with open(self._quote_path(ticker_text)) as file:
+            return json.load(file)
+
+
+def get_provider():
+    """Returns provider selected with TICKERY_PROVIDER environment variable ("yahoo" by default, or "file" reading TICKERY_RECORDED_DATA_DIR)"""
+
+    global _provider
+    if _provider is None:
+        if os.environ.get("TICKERY_PROVIDER", "yahoo") == "file":
+            _provider = FileProvider(
+                os.environ.get("TICKERY_RECORDED_DATA_DIR", "recorded")
+            )
+        else:
+            _provider = YahooProvider()
+
+    return _provider
+
+
+def set_provider(provider):
+    """Replaces provider used by the whole app, e.g. with FileProvider in benchmarks"""
+
+    global _provider
+    _provider = provider
+
+
+def record_market_data(tickers, root, intervals=("1d",), years=5):
+    """Records data of provided tickers from Yahoo Finance into directory readable by FileProvider"""
+
+    source = YahooProvider()
+    end = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+    start = end - pd.DateOffset(years=years)
+
+    for ticker_text in tickers:
+        ticker_text = ticker_text.upper()
+
+        for interval in intervals:
+            path = os.path.join(root, "history", interval, f"{ticker_text}.parquet")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            source.history(ticker_text, interval, start, end).to_parquet(path)
+
+        try:
+            logo_url = source.logo_url(ticker_text)
+        except Exception:
+            logo_url = None
+        quote = {
+            "info": source.info(ticker_text),
+            "price": source.price(ticker_text),
+            "modules": source.modules(ticker_text, MODULES),
+            "logo_url": logo_url,
+        }
+        path = os.path.join(root, "quotes", f"{ticker_text}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(quote, file, default=str)
+
+        for statement in STATEMENTS:
+            for frequency in FREQUENCIES:
+                path = os.path.join(
+                    root, "statements", ticker_text, f"{statement}_{frequency}.parquet"
+                )
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                data = source.financial_statement(ticker_text, statement, frequency)
+                data.to_parquet(path)
+
+
+if __name__ == "__main__":
+    # Usage: python providers.py <directory> <ticker> [<ticker> ...]
+    record_market_data(sys.argv[2:], sys.argv[1], intervals=("1d", "1wk", "1mo"))
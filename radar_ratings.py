@@ -1,15 +1,23 @@
-import yahooquery as yq
-from yahooquery import Ticker
 import numpy as np
-import yfinance as yf
 
+from market_data import get_price_data
+from providers import get_provider
 
-def value_rating(ticker_text):
+# Declaring constant variables
+RATING_MODULES = ["summaryDetail", "financialData", "defaultKeyStatistics"]
+
+
+def get_fundamentals(ticker_text):
+    """Fetches all fundamentals modules needed for ratings of provided ticker in a single request"""
+
+    return get_provider().modules(ticker_text, RATING_MODULES)
+
+
+def value_rating(fundamentals):
     """Assigns a rating from 0 to 5, depending on PE ratio of the ticker selected by the user"""
 
-    ticker = Ticker(ticker_text)
     try:
-        pe_ratio = ticker.summary_detail[ticker_text]["trailingPE"]
+        pe_ratio = fundamentals["summaryDetail"]["trailingPE"]
     except KeyError:
         return 0
     if pe_ratio < 20:
@@ -24,11 +32,10 @@ def value_rating(ticker_text):
         return 1
 
 
-def debt_rating(ticker_text):
+def debt_rating(fundamentals):
     """Assigns a rating from 0 to 5, depending on debt to equity ratio of the ticker selected by the user"""
-    ticker = Ticker(ticker_text)
     try:
-        de_ratio = ticker.financial_data[ticker_text]["debtToEquity"] / 100
+        de_ratio = fundamentals["financialData"]["debtToEquity"] / 100
     except KeyError:
         return 0
     if de_ratio < 0.25:
@@ -66,12 +73,11 @@ def stability_rating(ohlc_data):
         return 1
 
 
-def dividend_rating(ticker_text):
+def dividend_rating(fundamentals):
     """Assigns a rating from 0 to 5, depending on trailing annual dividend yield of the ticker selected by the user"""
-    ticker = Ticker(ticker_text)
     try:
         dividend_yield = (
-            ticker.summary_detail[ticker_text]["trailingAnnualDividendYield"] * 100
+            fundamentals["summaryDetail"]["trailingAnnualDividendYield"] * 100
         )
     except KeyError:
         return 0
@@ -89,12 +95,11 @@ def dividend_rating(ticker_text):
         return 0
 
 
-def future_rating(ticker_text):
+def future_rating(fundamentals):
     """Assigns a rating from 0 to 5, depending on forward EPS of the ticker selected by the user"""
 
-    ticker = Ticker(ticker_text)
     try:
-        forward_eps = ticker.key_stats[ticker_text]["forwardEps"]
+        forward_eps = fundamentals["defaultKeyStatistics"]["forwardEps"]
     except KeyError:
         return 0
     if forward_eps > 15:
@@ -112,16 +117,16 @@ def future_rating(ticker_text):
 def check_all(ticker_text):
     """Returns a lists of all company condition ratings"""
 
-    price_data = yf.download(
-        tickers=ticker_text, interval="1d", period="1y", prepost=False, threads=True,
-    )
+    price_data = get_price_data(ticker_text, "1d", period="1y")
     price_data = price_data.reset_index()
 
-    value = value_rating(ticker_text)
-    debt = debt_rating(ticker_text)
+    fundamentals = get_fundamentals(ticker_text)
+
+    value = value_rating(fundamentals)
+    debt = debt_rating(fundamentals)
     stability = stability_rating(price_data)
-    dividend = dividend_rating(ticker_text)
-    future = future_rating(ticker_text)
+    dividend = dividend_rating(fundamentals)
+    future = future_rating(fundamentals)
 
     list = [value, debt, stability, dividend, future]
 
@@ -0,0 +1,172 @@
+import bisect
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from indicator_engine import sma
+
+# Risk measures (VaR, CVaR and beta against a benchmark) on NumPy arrays of returns,
+# e.g. -0.02 for -2%. VaR and CVaR are returned as returns too, so losses are negative numbers.
+
+# Declaring constant variables
+METHODS = ["Historical", "Parametric", "Cornish-Fisher"]
+# Number of tail quantiles averaged to get Cornish-Fisher CVaR
+TAIL_POINTS = 1000
+
+
+def var_and_cvar(returns, levels):
+    """Returns DataFrame with VaR and CVaR (columns for every method) of provided confidence levels (rows), all from one sort of returns"""
+
+    returns = np.sort(np.asarray(returns, dtype=float))
+    returns = returns[~np.isnan(returns)]
+    levels = np.asarray(levels, dtype=float)
+    tails = 1 - levels
+    columns = pd.MultiIndex.from_product([["VaR", "CVaR"], METHODS])
+    if len(returns) < 2:
+        return pd.DataFrame(np.nan, index=levels, columns=columns)
+
+    # Historical: same linear interpolation as pandas quantile, tail means from cumulative sum
+    positions = tails * (len(returns) - 1)
+    lower = np.floor(positions).astype(int)
+    upper = np.minimum(lower + 1, len(returns) - 1)
+    historical_var = returns[lower] + (positions - lower) * (
+        returns[upper] - returns[lower]
+    )
+    counts = np.searchsorted(returns, historical_var, side="right")
+    historical_cvar = np.cumsum(returns)[counts - 1] / counts
+
+    mean = returns.mean()
+    std = returns.std(ddof=1)
+    deviations = returns - mean
+    variance = np.mean(deviations ** 2)
+    skewness = np.mean(deviations ** 3) / variance ** 1.5
+    excess_kurtosis = np.mean(deviations ** 4) / variance ** 2 - 3
+
+    # Parametric: normal distribution, CVaR is its mean below VaR
+    z = norm.ppf(tails)
+    parametric_var = mean + z * std
+    parametric_cvar = mean - std * norm.pdf(z) / tails
+
+    # Cornish-Fisher: normal quantile corrected for skewness and kurtosis, CVaR averages corrected quantiles of the tail.
+    # Expansion is used only where it grows with z, beyond that point tail quantiles stay at its value instead of diverging,
+    # with too high skewness or kurtosis it isn't monotonic even around the median and there are no Cornish-Fisher values (NaN)
+    lowest_z = _cornish_fisher_lowest_z(skewness, excess_kurtosis)
+    if np.isnan(lowest_z):
+        cornish_fisher_var = np.full(len(levels), np.nan)
+        cornish_fisher_cvar = np.full(len(levels), np.nan)
+    else:
+        cornish_fisher_var = (
+            mean
+            + _cornish_fisher(np.maximum(z, lowest_z), skewness, excess_kurtosis)
+            * std
+        )
+        tail_z = norm.ppf(
+            tails[:, np.newaxis] * (np.arange(TAIL_POINTS) + 0.5) / TAIL_POINTS
+        )
+        cornish_fisher_cvar = (
+            mean
+            + _cornish_fisher(
+                np.maximum(tail_z, lowest_z), skewness, excess_kurtosis
+            ).mean(axis=1)
+            * std
+        )
+
+    return pd.DataFrame(
+        np.column_stack(
+            [
+                historical_var,
+                parametric_var,
+                cornish_fisher_var,
+                historical_cvar,
+                parametric_cvar,
+                cornish_fisher_cvar,
+            ]
+        ),
+        index=levels,
+        columns=columns,
+    )
+
+
+def rolling_historical_var_and_cvar(returns, window, levels):
+    """Returns historical VaR and CVaR arrays (one row per confidence level) over trailing windows of returns, NaN until the window is filled.
+
+    Window is kept sorted, so every step costs a binary search insertion and a sum of the tail only, instead of sorting the whole window again"""
+
+    returns = np.asarray(returns, dtype=float)
+    tails = 1 - np.asarray(levels, dtype=float)
+    positions = tails * (window - 1)
+    lowers = np.floor(positions).astype(int).tolist()
+    uppers = np.minimum(np.floor(positions).astype(int) + 1, window - 1).tolist()
+    fractions = (positions - np.floor(positions)).tolist()
+
+    var = np.full((len(tails), len(returns)), np.nan)
+    cvar = np.full((len(tails), len(returns)), np.nan)
+    values = returns.tolist()
+    sorted_window = []
+    for i, value in enumerate(values):
+        bisect.insort(sorted_window, value)
+        if i >= window:
+            del sorted_window[bisect.bisect_left(sorted_window, values[i - window])]
+        if i < window - 1:
+            continue
+
+        for j, (lower, upper, fraction) in enumerate(zip(lowers, uppers, fractions)):
+            level_var = sorted_window[lower] + fraction * (
+                sorted_window[upper] - sorted_window[lower]
+            )
+            count = bisect.bisect_right(sorted_window, level_var)
+            var[j, i] = level_var
+            cvar[j, i] = sum(sorted_window[:count]) / count
+
+    return var, cvar
+
+
+def rolling_beta_alpha_correlation(returns, benchmark_returns, window):
+    """Returns beta, alpha and correlation of returns against benchmark returns over trailing windows, NaN until the window is filled.
+
+    All of them come from running sums of returns, their squares and products, so cost is linear in the number of bars"""
+
+    returns = np.asarray(returns, dtype=float)
+    benchmark_returns = np.asarray(benchmark_returns, dtype=float)
+    mean = sma(returns, window)
+    benchmark_mean = sma(benchmark_returns, window)
+    covariance = sma(returns * benchmark_returns, window) - mean * benchmark_mean
+    variance = np.maximum(sma(returns ** 2, window) - mean ** 2, 0)
+    benchmark_variance = np.maximum(
+        sma(benchmark_returns ** 2, window) - benchmark_mean ** 2, 0
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = covariance / benchmark_variance
+        correlation = covariance / np.sqrt(variance * benchmark_variance)
+    alpha = mean - beta * benchmark_mean
+
+    return beta, alpha, correlation
+
+
+def _cornish_fisher(z, skewness, excess_kurtosis):
+    """Returns standard normal quantiles adjusted for skewness and excess kurtosis"""
+
+    return (
+        z
+        + (z ** 2 - 1) * skewness / 6
+        + (z ** 3 - 3 * z) * excess_kurtosis / 24
+        - (2 * z ** 3 - 5 * z) * skewness ** 2 / 36
+    )
+
+
+def _cornish_fisher_lowest_z(skewness, excess_kurtosis):
+    """Returns the lowest standard normal quantile down to which Cornish-Fisher expansion grows with z (-inf if it does everywhere below the median), NaN if it doesn't grow at the median"""
+
+    # Derivative of the expansion is a quadratic function of z
+    a = excess_kurtosis / 8 - skewness ** 2 / 6
+    b = skewness / 3
+    c = 1 - excess_kurtosis / 8 + 5 * skewness ** 2 / 36
+    if c <= 0:
+        return np.nan
+
+    roots = np.roots([a, b, c])
+    below_median = roots[np.isreal(roots) & (roots.real < 0)].real
+
+    return below_median.max() if len(below_median) else -np.inf
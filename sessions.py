@@ -0,0 +1,35 @@
+import os
+
+import diskcache
+from dash.exceptions import PreventUpdate
+
+from cache import DATA_DIR
+
+# Declaring constant variables
+# Numbers of latest searches are kept on disk, so they are seen by all worker processes and background jobs
+SESSIONS_DIR = os.path.join(DATA_DIR, "sessions")
+# Seconds after which search of an inactive browser session is forgotten
+SESSION_TTL = 24 * 3600
+
+_searches = diskcache.Cache(SESSIONS_DIR)
+
+
+def submit_search(session_id, search_number):
+    """Remembers provided number (increasing with every search in the browser) as the latest search of the session, delayed older searches never replace newer ones"""
+
+    with _searches.transact():
+        if search_number > _searches.get(session_id, 0):
+            _searches.set(session_id, search_number, expire=SESSION_TTL)
+
+
+def is_superseded(session_id, search_number):
+    """Checks whether user has searched for another ticker in the browser session after search of provided number"""
+
+    return _searches.get(session_id, search_number) > search_number
+
+
+def abandon_if_superseded(session_id, search_number):
+    """Stops the callback (without updating its outputs) if its search is no longer the latest one of the user"""
+
+    if is_superseded(session_id, search_number):
+        raise PreventUpdate
@@ -0,0 +1,159 @@
+import io
+import os
+import time
+import bisect
+import logging
+import threading
+
+import pandas as pd
+import requests
+
+from cache import cached
+from market_data import DATA_DIR
+from providers import get_provider
+
+# Declaring constant variables
+SYMBOLS_PATH = os.path.join(DATA_DIR, "symbols.csv")
+# Symbols missing from exchange lists, but confirmed by the market data provider
+VALIDATED_SYMBOLS_PATH = os.path.join(DATA_DIR, "validated_symbols.csv")
+SYMBOL_LISTS = {
+    "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt": "Symbol",
+    "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt": "ACT Symbol",
+}
+# Validation result of symbols missing from the directory is kept for an hour
+VALIDATION_TTL = 3600
+
+# Sorted symbols and their names at the same positions, loaded on first use
+_symbols = None
+_names = None
+_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_symbol_directory():
+    """Downloads lists of all symbols listed on US exchanges and saves them as local symbol directory"""
+
+    directories = []
+    for url, symbol_column in SYMBOL_LISTS.items():
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+        listed = pd.read_csv(io.StringIO(response.text), sep="|", dtype=str)
+        # Last row of the file is its creation time, not a symbol
+        listed = listed[listed["Test Issue"] == "N"]
+        directories.append(
+            pd.DataFrame(
+                {
+                    # Yahoo Finance uses "-" for share classes, e.g. BRK-B
+                    "Symbol": listed[symbol_column].str.replace(".", "-", regex=False),
+                    "Name": listed["Security Name"],
+                }
+            )
+        )
+
+    directory = pd.concat(directories).dropna().drop_duplicates("Symbol")
+    os.makedirs(os.path.dirname(SYMBOLS_PATH), exist_ok=True)
+    directory.to_csv(SYMBOLS_PATH, index=False)
+
+    with _lock:
+        _load(_read_directory())
+
+
+def is_known_symbol(ticker_text):
+    """Checks whether provided ticker is in the local symbol directory"""
+
+    symbols, _ = _directory()
+    ticker_text = ticker_text.upper()
+    position = bisect.bisect_left(symbols, ticker_text)
+
+    return position < len(symbols) and symbols[position] == ticker_text
+
+
+def suggest_symbols(prefix, limit=10):
+    """Returns up to limit (symbol, name) pairs from the local symbol directory starting with provided prefix"""
+
+    symbols, names = _directory()
+    prefix = prefix.upper()
+    start = bisect.bisect_left(symbols, prefix)
+    end = min(bisect.bisect_left(symbols, prefix + "\uffff"), start + limit)
+
+    return list(zip(symbols[start:end], names[start:end]))
+
+
+def validate_symbol(ticker_text):
+    """Checks whether provided ticker exists, asking the market data provider only about symbols missing from the local directory"""
+
+    if is_known_symbol(ticker_text):
+        return True
+
+    valid = cached(
+        ("symbol validation", get_provider().name, ticker_text.upper()),
+        lambda: get_provider().validate(ticker_text),
+        lambda valid: time.time() + VALIDATION_TTL,
+    )
+    if valid:
+        _add_symbol(ticker_text.upper(), "")
+
+    return valid
+
+
+def _directory():
+    """Returns sorted symbols and names, loading them from disk (or downloading them) on first use"""
+
+    global _symbols, _names
+    with _lock:
+        if _symbols is None:
+            _load(_read_directory())
+            # Recorded (offline) providers validate symbols locally anyway
+            if not os.path.exists(SYMBOLS_PATH) and get_provider().name == "yahoo":
+                logger.warning("Symbol directory is not available, downloading it")
+                threading.Thread(target=_try_refresh, daemon=True).start()
+
+        return _symbols, _names
+
+
+def _try_refresh():
+    """Refreshes symbol directory in the background, logging instead of raising errors"""
+
+    try:
+        refresh_symbol_directory()
+    except Exception:
+        logger.exception("Downloading symbol directory failed")
+
+
+def _read_directory():
+    """Reads symbols and names saved on disk"""
+
+    directories = [pd.DataFrame(columns=["Symbol", "Name"])]
+    for path in (SYMBOLS_PATH, VALIDATED_SYMBOLS_PATH):
+        if os.path.exists(path):
+            directories.append(pd.read_csv(path, dtype=str, keep_default_na=False))
+
+    return pd.concat(directories).drop_duplicates("Symbol")
+
+
+def _load(directory):
+    """Replaces symbol directory with the provided DataFrame of symbols and names"""
+
+    global _symbols, _names
+    directory = directory.assign(Symbol=directory["Symbol"].str.upper())
+    directory = directory.sort_values("Symbol")
+    _symbols = directory["Symbol"].tolist()
+    _names = directory["Name"].tolist()
+
+
+def _add_symbol(ticker_text, name):
+    """Adds symbol validated by the provider to the directory, so it is not validated over network again"""
+
+    with _lock:
+        position = bisect.bisect_left(_symbols, ticker_text)
+        if position < len(_symbols) and _symbols[position] == ticker_text:
+            return
+        _symbols.insert(position, ticker_text)
+        _names.insert(position, name)
+
+        os.makedirs(os.path.dirname(VALIDATED_SYMBOLS_PATH), exist_ok=True)
+        header = not os.path.exists(VALIDATED_SYMBOLS_PATH)
+        pd.DataFrame({"Symbol": [ticker_text], "Name": [name]}).to_csv(
+            VALIDATED_SYMBOLS_PATH, mode="a", header=header, index=False
+        )
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from risk_engine import var_and_cvar
+
+LEVELS = [0.9, 0.95, 0.99]
+
+
+@pytest.mark.parametrize("degrees_of_freedom", [3, 4, 6])
+@pytest.mark.parametrize("seed", range(10))
+def test_cornish_fisher_cvar_is_bounded_by_historical(degrees_of_freedom, seed):
+    """Cornish-Fisher CVaR of fat tailed returns stays in the tail, but doesn't diverge far beyond historical CVaR"""
+
+    returns = (
+        np.random.default_rng(seed).standard_t(degrees_of_freedom, 500) * 0.01
+    )
+    table = var_and_cvar(returns, LEVELS)
+
+    # Expansion not fitting the returns gives no Cornish-Fisher values at all
+    fitted = table["CVaR", "Cornish-Fisher"].notna()
+    cornish_fisher = table["CVaR", "Cornish-Fisher"][fitted]
+    historical = table["CVaR", "Historical"][fitted]
+    assert (cornish_fisher <= table["VaR", "Cornish-Fisher"][fitted]).all()
+    assert (cornish_fisher >= 2 * historical).all()
+
+
+def test_cornish_fisher_is_missing_without_monotonic_expansion():
+    """Without monotonic expansion around the median, there are no Cornish-Fisher values instead of parametric ones"""
+
+    returns = np.concatenate([np.full(200, 0.001), [-0.2, 0.25, 0.3]])
+    table = var_and_cvar(returns, LEVELS)
+
+    assert table["VaR", "Cornish-Fisher"].isna().all()
+    assert table["CVaR", "Cornish-Fisher"].isna().all()
+    assert table["CVaR", "Parametric"].notna().all()
@@ -1,26 +1,61 @@
+import re
+import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
 import dash_bootstrap_components as dbc
 from dash import html
 import plotly.express as px
+import plotly.graph_objects as go
 import matplotlib.pyplot as plt
-import yfinance as yf
 import numpy as np
-from scipy.stats import norm
-from statistics import mean
+import pandas as pd
+
+from cache import cached
+from market_data import get_price_data, period_to_start, warm_up_start, trim_warm_up
+from providers import get_provider
+from risk_engine import rolling_beta_alpha_correlation
 
 GREEN = "#00b51a"
 RED = "#ff2d21"
+MAX_DISTRIBUTION_BINS = 500
+# Longest period selectable on the summary range slider, shorter ones are sliced from it
+SUMMARY_HISTORY_PERIOD = "5y"
+# Financial statements change quarterly, formatted tables are kept for a few hours
+FINANCIALS_TTL = 6 * 3600
+CAMEL_CASE_BOUNDARY = re.compile(r"(?<=[^A-Z])([A-Z])")
+
+_io_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="io")
+
+
+def fetch_concurrently(calls, timeouts, optional=()):
+    """Runs provided independent I/O calls (dictionary of name: function) at the same time on a bounded thread pool and returns dictionary of their results.
+
+    Each call gets its own timeout (in seconds). Optional calls which fail or don't finish in time return None, other ones raise their error"""
+
+    start = time.monotonic()
+    futures = {name: _io_executor.submit(function) for name, function in calls.items()}
+
+    results = {}
+    for name, future in futures.items():
+        remaining = max(0, timeouts[name] - (time.monotonic() - start))
+        try:
+            results[name] = future.result(timeout=remaining)
+        except Exception:
+            if name not in optional:
+                raise
+            results[name] = None
+
+    return results
 
 
 def prepare_summary_tab_data(ticker_text, period=1):
-    """Returns data needed for summary tab charts and some stats about price data"""
-
-    price_data = yf.download(
-        tickers=ticker_text,
-        interval="1d",
-        period=f"{period}y",
-        prepost=False,
-        threads=True,
-    )
+    """Returns data needed for summary tab charts and some stats about price data of the last period years.
+
+    Every period is sliced from the same cached daily history, so moving the range slider doesn't download anything"""
+
+    history = get_price_data(ticker_text, "1d", period=SUMMARY_HISTORY_PERIOD)
+    price_data = history[history.index >= period_to_start(f"{period}y")]
     price_data = price_data.reset_index()
 
     period_change = round(
@@ -66,8 +101,14 @@ def add_indicator_button(
     param_2_value,
     s2_display,
     button_visible,
+    multiple_values=False,
 ):
-    """Based on of indicator and indicator settings selected by user, returns html.Div container with main button and clear button"""
+    """Based on of indicator and indicator settings selected by user, returns html.Div container with main button and clear button.
+
+    With multiple_values parameters are entered as comma separated lists, e.g. 10, 20, 50"""
+
+    param_type = "text" if multiple_values else "number"
+    placeholder = "Comma separated values" if multiple_values else None
 
     return html.Div(
         children=[
@@ -93,7 +134,8 @@ def add_indicator_button(
                             dbc.Label(f"{param_1_name}:"),
                             dbc.Input(
                                 id=f"{indicator_short}_param1",
-                                type="number",
+                                type=param_type,
+                                placeholder=placeholder,
                                 disabled=False,
                             ),
                             dbc.Label(
@@ -101,7 +143,8 @@ def add_indicator_button(
                             ),
                             dbc.Input(
                                 id=f"{indicator_short}_param2",
-                                type="number",
+                                type=param_type,
+                                placeholder=placeholder,
                                 disabled=False,
                                 style={"display": s2_display},
                             ),
@@ -126,6 +169,72 @@ def add_indicator_button(
     )
 
 
+def parse_parameter_list(value, cast=int):
+    """Returns list of positive parameter values from a number or comma separated text entered by user, skipping invalid ones"""
+
+    if value is None:
+        return []
+
+    values = []
+    for text in str(value).split(","):
+        try:
+            parameter = float(text)
+        except ValueError:
+            continue
+        if not np.isfinite(parameter):
+            continue
+        parameter = cast(parameter)
+        if parameter > 0 and parameter not in values:
+            values.append(parameter)
+
+    return values
+
+
+def load_chart_data(ticker_text, interval, start_date, end_date, warm_up):
+    """Returns price history with warm up bars before start date and its part drawn on the chart, indexed by bar number"""
+
+    start = warm_up_start(start_date, interval, warm_up, end_date)
+    history = get_price_data(ticker_text, interval, start, end_date)
+    # Warm-up is best effort, without bars before start date indicators just start later
+    if history.empty and start < pd.Timestamp(start_date):
+        history = get_price_data(ticker_text, interval, start_date, end_date)
+    ticker = trim_warm_up(history, start_date) if not history.empty else history
+    if ticker.empty:
+        return history, ticker
+
+    ticker = ticker.reset_index()
+    # Dropping last row beacuse it is called incorrectly for some reason
+    if ticker.columns[0] == "Datetime" and len(ticker) > 1:
+        if str(ticker.iloc[-1, 0])[:19] != str(ticker.iloc[-2, 0])[:19]:
+            ticker = ticker[:-1]
+            history = history[:-1]
+
+    return history, ticker
+
+
+def price_trace(ticker, chart_type):
+    """Returns price trace of provided chart type (candlesticks, bars or linear)"""
+
+    if chart_type == "candlesticks":
+        return go.Candlestick(
+            x=ticker.index,
+            open=ticker["Open"],
+            high=ticker["High"],
+            low=ticker["Low"],
+            close=ticker["Close"],
+        )
+    elif chart_type == "bars":
+        return go.Ohlc(
+            x=ticker.index,
+            open=ticker["Open"],
+            high=ticker["High"],
+            low=ticker["Low"],
+            close=ticker["Close"],
+        )
+    else:
+        return go.Scatter(x=ticker.index, y=ticker["Close"],)
+
+
 def prepare_price_statistics(ticker):
     """Returns html.H5 labels with statistics about price data of provided ticker"""
 
@@ -173,88 +282,67 @@ def prepare_price_statistics(ticker):
     return stats
 
 
+def get_financial_statement(ticker_text, statement, frequency):
+    """Returns financial statement of provided ticker formatted for Dash Table, cached per ticker, statement and frequency"""
+
+    table_data = cached(
+        (
+            "financial statement",
+            get_provider().name,
+            ticker_text.upper(),
+            statement,
+            frequency,
+        ),
+        lambda: format_table_data(
+            get_provider().financial_statement(ticker_text, statement, frequency),
+            frequency,
+        ),
+        lambda table_data: time.time() + FINANCIALS_TTL,
+    )
+
+    return table_data.copy()
+
+
 def format_table_data(table_data, frequency):
     """Formats a financial data to the format matching Dash Table"""
 
-    table_data.reset_index(inplace=True)
-    table_data = table_data.transpose()
-    table_data.reset_index(inplace=True)
-    table_data.drop(0, 0, inplace=True)
-
-    table_data.columns = table_data.iloc[0]
-    table_data = table_data[1:]
+    dates = table_data["asOfDate"].astype(str).str[:7]
+    period_types = table_data["periodType"]
+    table_data = table_data.drop(
+        columns=["asOfDate", "periodType", "currencyCode"]
+    ).transpose()
 
-    table_data.index = table_data.iloc[:, 0]
-    table_data = table_data.iloc[:, 1:]
+    # Removing rows with any missing value or with only empty and zero values
+    empty = table_data.isna() | table_data.isin(["", 0])
+    table_data = table_data[~empty.all(axis=1) & table_data.notna().all(axis=1)]
 
-    rows_to_keep = []
-    for i in range(len(table_data)):
-        if not all(
-            str(cell) == "" or cell == 0 or cell is None for cell in table_data.iloc[i]
-        ):
-            rows_to_keep.append(i)
-    table_data = table_data.iloc[rows_to_keep]
-    table_data.dropna(inplace=True)
+    columns_to_keep = (period_types != "TTM").to_numpy()
+    table_data = table_data.loc[:, columns_to_keep]
+    table_data.columns = dates[columns_to_keep]
+    table_data = table_data.iloc[:, -4:]
 
+    table_data = table_data.astype(float).apply(
+        lambda column: column.map("{:,}".format)
+    )
+    table_data.index = table_data.index.map(humanize_label)
     table_data.index.name = ""
-    table_data.columns.name = "Date"
-
-    columns_to_keep = []
-    for x in range(len(table_data.columns)):
-        if table_data.iloc[0, x] != "TTM":
-            columns_to_keep.append(x)
-    table_data = table_data.iloc[:, columns_to_keep]
-
-    table_data.drop(table_data.index[1], 0, inplace=True)
-    table_data.drop(table_data.index[0], 0, inplace=True)
-
-    length = len(table_data.index)
-    width = len(table_data.columns)
-
-    for l in range(length):
-        for w in range(width):
-            if type(table_data.iloc[l, w]) == float:
-                table_data.iloc[l, w] = format(table_data.iloc[l, w], ",")
-
-    new_columns = []
-    for x in range(len(table_data.columns)):
-        if frequency == "a":
-            new_label = str(table_data.columns[x])[:7]
-        elif frequency == "q":
-            new_label = str(table_data.columns[x])[:7]
-        new_columns.append(new_label)
-
-    table_data.columns = new_columns
-    table_data = table_data.iloc[:, -4:]
-    table_data.reset_index(inplace=True)
 
-    # Formatting table labels text
-    for r in range(len(table_data.index)):
-        for c in range(len(table_data.columns)):
-            new_x = ""
-            x = table_data.iloc[r, c]
-            for y in range(len(x)):
-                if x[y].isupper() and x[y - 1].isupper() == False and y != 0:
-                    z = f" {x[y]}"
-                    new_x = new_x + z
-                else:
-                    new_x = new_x + x[y]
-            table_data.iloc[r, c] = new_x
+    return table_data.reset_index()
 
-    return table_data
 
+@lru_cache(maxsize=None)
+def humanize_label(label):
+    """Splits camelCase financial data label into separate words, e.g. TotalRevenue to Total Revenue"""
 
-def prepare_distribution_and_price_data(ticker_text, interval, start_date, end_date):
+    return CAMEL_CASE_BOUNDARY.sub(r" \1", label)
+
+
+def prepare_distribution_and_price_data(
+    ticker_text, interval, start_date, end_date, bins="fd"
+):
     """Downloads price OHLC data for provided ticker, then formats it and calculates values needed for distribution and percentage returns charts"""
 
-    price_data = yf.download(
-        tickers=ticker_text,
-        interval=interval,
-        start=start_date,
-        end=end_date,
-        prepost=False,
-        threads=True,
-    )
+    price_data = get_price_data(ticker_text, interval, start_date, end_date)
 
     if price_data.empty:
         return None, True
@@ -264,24 +352,7 @@ def prepare_distribution_and_price_data(ticker_text, interval, start_date, end_d
         / price_data["Close"].shift(1)
         * 100
     )
-    average_return = price_data["Daily returns"].mean()
-    zeros_after_decimal = count_zeros_after_decimal(average_return)
-    multiplier = float("0." + "0" * zeros_after_decimal + "5")
-
-    price_data["Rounded daily returns"] = (
-        round(price_data["Daily returns"] / multiplier) * multiplier
-    )
-    price_data["Counted returns"] = None
-    for i in range(len(price_data.index)):
-        price_data["Counted returns"].iloc[i] = price_data[
-            price_data["Rounded daily returns"]
-            == price_data["Rounded daily returns"].iloc[i]
-        ]["Rounded daily returns"].count()
-
-    distribution_data = price_data.iloc[:, -2:]
-    distribution_data.drop_duplicates(subset=["Rounded daily returns"])
-    distribution_data = distribution_data.set_index("Rounded daily returns")
-    distribution_data.sort_index(inplace=True)
+    distribution_data = returns_distribution(price_data["Daily returns"], bins)
 
     price_data["Daily log returns"] = round(np.log(1 + price_data["Daily returns"]), 2)
 
@@ -297,61 +368,129 @@ def prepare_distribution_and_price_data(ticker_text, interval, start_date, end_d
     }
 
 
-def count_zeros_after_decimal(number):
-    """Counts number of "0" after decimal in selected number"""
+def returns_distribution(returns, bins="fd"):
+    """Counts returns falling into bins in a single pass. Bins are chosen by provided rule: "fd" (Freedman–Diaconis), "scott" or a fixed number of bins"""
 
-    number_after_decimal = str(number).split(".")[1]
-    count = 1
-    for symbol in number_after_decimal:
-        if symbol == "0":
-            count += 1
-        else:
-            break
-    return count
+    returns = returns.dropna().to_numpy()
+    edges = np.histogram_bin_edges(returns, bins=bins)
+    # Rules based on spread can produce thousands of bins for series with outliers
+    if len(edges) > MAX_DISTRIBUTION_BINS + 1:
+        edges = np.histogram_bin_edges(returns, bins=MAX_DISTRIBUTION_BINS)
+    counts, edges = np.histogram(returns, bins=edges)
 
+    distribution_data = pd.DataFrame(
+        {"Counted returns": counts, "Bin width": np.diff(edges)},
+        index=pd.Index((edges[:-1] + edges[1:]) / 2, name="Rounded daily returns"),
+    )
 
-def get_linear_regression_params(ticker, interval, start_date, end_date):
-    """Calculates and creates linear regression chart with trendline of provided stock"""
+    return distribution_data
 
-    data = yf.download(
-        tickers=f"{ticker} SPY", interval=interval, start=start_date, end=end_date
-    )
 
-    data = data["Close"]
+def get_linear_regression_params(
+    ticker, interval, start_date, end_date, benchmark="SPY"
+):
+    """Calculates and creates linear regression chart with trendline of provided stock"""
 
-    returns = np.log(data).diff()
-    returns = returns.dropna()
+    returns = get_benchmark_returns(ticker, benchmark, interval, start_date, end_date)
     correlation = returns.corr()
-    reg = np.polyfit(returns["SPY"], returns[ticker], deg=1)
-    trend = np.polyval(reg, returns[ticker])
+    # Regression needs at least two common bars, otherwise there is no trend line
+    if len(returns) >= 2:
+        reg = np.polyfit(returns["Benchmark"], returns["Stock"], deg=1)
+        trend = np.polyval(reg, returns["Benchmark"])
+    else:
+        trend = np.full(len(returns), np.nan)
     output = {"Returns": returns, "Correlation": correlation, "Trend": trend}
 
     return output
 
 
-def calculate_streak(data, up=True):
-    """Calculates longest streak of up or down values in provided DataFrame"""
+def get_rolling_regression(
+    ticker, interval, start_date, end_date, window, benchmark="SPY"
+):
+    """Returns DataFrame with beta, alpha and correlation of provided stock against benchmark over trailing windows of bars, starting at start date"""
+
+    returns = get_benchmark_returns(
+        ticker,
+        benchmark,
+        interval,
+        warm_up_start(start_date, interval, window + 1, end_date),
+        end_date,
+    )
+    beta, alpha, correlation = rolling_beta_alpha_correlation(
+        returns["Stock"].to_numpy(), returns["Benchmark"].to_numpy(), window
+    )
+    rolling = pd.DataFrame(
+        {"Beta": beta, "Alpha": alpha, "Correlation": correlation},
+        index=returns.index,
+    )
+
+    return trim_warm_up(rolling, start_date)
+
 
-    max_streak = 0
-    current_streak = 0
-    if up == True:
-        for row in range(len(data.index)):
-            if data.iloc[row, 0] > 0:
-                current_streak += 1
-                if current_streak > max_streak:
-                    max_streak = current_streak
-            else:
-                current_streak = 0
-    else:
-        for row in range(len(data.index)):
-            if data.iloc[row, 0] < 0:
-                current_streak += 1
-                if current_streak > max_streak:
-                    max_streak = current_streak
-            else:
-                current_streak = 0
+def get_benchmark_returns(ticker, benchmark, interval, start_date, end_date):
+    """Returns DataFrame with log returns of provided stock ("Stock" column) and benchmark ("Benchmark" column) at the same bars"""
+
+    stock = get_close_prices(ticker, interval, start_date, end_date)
+    benchmark_prices = get_close_prices(benchmark, interval, start_date, end_date)
+    # Returns are compared at common bars only, so there are none if either ticker has no bars
+    if stock.empty or benchmark_prices.empty:
+        return pd.DataFrame(
+            columns=["Stock", "Benchmark"], index=pd.DatetimeIndex([]), dtype=float
+        )
+
+    data = pd.concat({"Stock": stock, "Benchmark": benchmark_prices}, axis=1)
 
-    return max_streak
+    returns = np.log(data).diff()
+
+    return returns.dropna()
+
+
+def get_close_prices(ticker, interval, start_date, end_date):
+    """Returns close prices of provided ticker, empty series if no bars could be loaded"""
+
+    price_data = get_price_data(ticker, interval, start_date, end_date)
+    if price_data.empty:
+        return pd.Series(dtype=float, index=pd.DatetimeIndex([]), name="Close")
+
+    return price_data["Close"]
+
+
+def returns_run_lengths(returns):
+    """Encodes returns as runs of up (1), down (-1) and flat (0) candles. Returns numpy arrays with sign, length and summed return of every run"""
+
+    returns = np.asarray(returns, dtype=float)
+    if len(returns) == 0:
+        return np.array([]), np.array([], dtype=int), np.array([])
+
+    signs = np.sign(returns)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(signs)) + 1))
+    lengths = np.diff(np.append(starts, len(returns)))
+    run_returns = np.add.reduceat(returns, starts)
+
+    return signs[starts], lengths, run_returns
+
+
+def streak_statistics(returns):
+    """Returns longest up and down streaks, distribution of streak lengths and average return per streak length, all from one run-length encoding of provided returns"""
+
+    signs, lengths, run_returns = returns_run_lengths(returns)
+    runs = pd.DataFrame(
+        {
+            "Direction": pd.Series(signs).map({1.0: "Up", -1.0: "Down", 0.0: "Flat"}),
+            "Length": lengths,
+            "Return": run_returns,
+        }
+    )
+    grouped = runs.groupby(["Length", "Direction"])["Return"]
+
+    return {
+        "Longest up streak": int(lengths[signs > 0].max(initial=0)),
+        "Longest down streak": int(lengths[signs < 0].max(initial=0)),
+        "Average up streak": lengths[signs > 0].mean() if (signs > 0).any() else 0,
+        "Average down streak": lengths[signs < 0].mean() if (signs < 0).any() else 0,
+        "Streak lengths": grouped.count().unstack(fill_value=0),
+        "Average streak return": grouped.mean().unstack(),
+    }
 
 
 def get_percentage_returns_statistics(data):
@@ -371,7 +510,6 @@ def get_percentage_returns_statistics(data):
     avg_up_candle = (data["Percentage returns"][data["Percentage returns"] > 0]).mean()
     max_up_candle = (data["Percentage returns"][data["Percentage returns"] > 0]).max()
     min_up_candle = (data["Percentage returns"][data["Percentage returns"] > 0]).min()
-    longest_up_streak = calculate_streak(data, True)
 
     number_of_down_candles = len(data[data["Percentage returns"] < 0])
     avg_down_candle = (
@@ -379,14 +517,19 @@ def get_percentage_returns_statistics(data):
     ).mean()
     max_down_candle = (data["Percentage returns"][data["Percentage returns"] > 0]).min()
     min_down_candle = (data["Percentage returns"][data["Percentage returns"] > 0]).min()
-    longest_down_streak = calculate_streak(data, False)
+
+    streaks = streak_statistics(data["Percentage returns"])
 
     output = {
         "Number of candles": number_of_candles,
         "Number of up candles": number_of_up_candles,
         "Number of down candles": number_of_down_candles,
-        "Longest up streak": longest_up_streak,
-        "Longest down streak": longest_down_streak,
+        "Longest up streak": streaks["Longest up streak"],
+        "Longest down streak": streaks["Longest down streak"],
+        "Average up streak": round(streaks["Average up streak"], 2),
+        "Average down streak": round(streaks["Average down streak"], 2),
+        "Streak lengths": streaks["Streak lengths"],
+        "Average streak return": streaks["Average streak return"],
         "Average candle": f"{round(avg_candle, 2)}%",
         "Biggest candle": f"{round(max_candle, 2)}%",
         "Smallest candle": f"{round(min_candle, 2)}%",
@@ -401,40 +544,41 @@ def get_percentage_returns_statistics(data):
     return output
 
 
-def monte_carlo_simulation(data, number_of_simulations=150, forecast_period=100):
-    """Returns numpy array of simulated prices for provided forecast period and number of simulations"""
+def monte_carlo_simulation(
+    data, number_of_simulations=150, forecast_period=100, seed=None, dtype=np.float64
+):
+    """Returns numpy array (forecast period x number of simulations) of simulated prices for provided forecast period and number of simulations.
+
+    All random returns are drawn at once from generator seeded with provided seed, so results are reproducible. np.float32 dtype halves memory needed for big runs"""
 
     returns = data["Close"].pct_change()
     initial_price = data["Close"].iloc[-1]
     average_return = returns.mean()
     return_std = returns.std()
 
-    simulated_prices = np.zeros((forecast_period, number_of_simulations))
-
-    for simulation in range(number_of_simulations):
-        prices = [initial_price]
-        for x in range(forecast_period):
-            daily_return = np.random.normal(average_return, return_std)
-            price = prices[-1] * (1 + daily_return)
-            prices.append(price)
-        simulated_prices[:, simulation] = prices[1:]
+    rng = np.random.default_rng(seed)
+    simulated_prices = rng.standard_normal(
+        (forecast_period, number_of_simulations), dtype=dtype
+    )
+    # Turning standard normal shocks into growth factors and chaining them into prices in place
+    simulated_prices *= return_std
+    simulated_prices += 1 + average_return
+    np.cumprod(simulated_prices, axis=0, out=simulated_prices)
+    simulated_prices *= initial_price
 
     return simulated_prices
 
 
 def monte_carlo_statistics(simulated_prices, initial_price):
-    """Returns basic statistics of provided simulated prices"""
-
-    ending_prices = []
+    """Returns basic statistics of provided simulated prices (forecast period x number of simulations array)"""
 
-    for simulation in simulated_prices:
-        ending_prices.append(simulation[-1])
+    ending_prices = simulated_prices[-1]
 
-    max_ending_price = round(max(ending_prices), 2)
-    min_ending_price = round(min(ending_prices), 2)
-    average_ending_price = round(mean(ending_prices), 2)
-    no_ending_price_higher_than_initial = len(
-        [price for price in ending_prices if price > initial_price]
+    max_ending_price = round(float(ending_prices.max()), 2)
+    min_ending_price = round(float(ending_prices.min()), 2)
+    average_ending_price = round(float(ending_prices.mean()), 2)
+    no_ending_price_higher_than_initial = np.count_nonzero(
+        ending_prices > initial_price
     )
     perc_of_ending_price_above_initial = round(
         no_ending_price_higher_than_initial / len(ending_prices) * 100, 2
@@ -450,66 +594,22 @@ def monte_carlo_statistics(simulated_prices, initial_price):
     }
 
 
-def historical_and_parametric_var_and_cvar(data):
-    """Returns VaR and CVaR for 0.95, 0.99 and 0.999 confidence level both for historical and parametric calculation method"""
-
-    data["Returns"] = data["Close"].pct_change()
-    data = data[["Returns"]]
-    data = data.dropna()
-    std = data["Returns"].std()
-    mean_return = data["Returns"].mean()
-
-    # HISTORICAL
-
-    var95 = data["Returns"].quantile(0.05)
-    cvar95 = data.loc[data["Returns"] <= var95, "Returns"].mean()
-
-    var99 = data["Returns"].quantile(0.01)
-    cvar99 = data.loc[data["Returns"] <= var99, "Returns"].mean()
-
-    var999 = data["Returns"].quantile(0.001)
-    cvar999 = data.loc[data["Returns"] <= var999, "Returns"].mean()
-
-    # PARAMETRIC
-
-    p_var95 = mean_return - norm.ppf(0.95) * std
-    p_cvar95 = -(mean_return + (1 - 0.95) ** -1 * norm.pdf(norm.ppf(1 - 0.95)) * std)
+def monte_carlo_fan_chart_data(
+    simulated_prices, percentiles=(5, 25, 50, 75, 95), sample_size=20, seed=None
+):
+    """Reduces simulated prices (forecast period x number of simulations array) to percentile bands and a small random sample of paths, so chart size doesn't depend on number of simulations"""
 
-    p_var99 = mean_return - norm.ppf(0.99) * std
-    p_cvar99 = -(mean_return + (1 - 0.99) ** -1 * norm.pdf(norm.ppf(1 - 0.99)) * std)
+    bands = np.percentile(simulated_prices, percentiles, axis=1)
 
-    p_var999 = mean_return - norm.ppf(0.999) * std
-    p_cvar999 = -(mean_return + (1 - 0.999) ** -1 * norm.pdf(norm.ppf(1 - 0.999)) * std)
+    rng = np.random.default_rng(seed)
+    sample_size = min(sample_size, simulated_prices.shape[1])
+    sample = rng.choice(simulated_prices.shape[1], size=sample_size, replace=False)
 
-    output = {
-        "Historical": {
-            "VaR": {
-                "95": round(var95 * 100, 2),
-                "99": round(var99 * 100, 2),
-                "99.9": round(var999 * 100, 2),
-            },
-            "CVaR": {
-                "95": round(cvar95 * 100, 2),
-                "99": round(cvar99 * 100, 2),
-                "99.9": round(cvar999 * 100, 2),
-            },
-        },
-        "Parametric": {
-            "VaR": {
-                "95": round(p_var95 * 100, 2),
-                "99": round(p_var99 * 100, 2),
-                "99.9": round(p_var999 * 100, 2),
-            },
-            "CVaR": {
-                "95": round(p_cvar95 * 100, 2),
-                "99": round(p_cvar99 * 100, 2),
-                "99.9": round(p_cvar999 * 100, 2),
-            },
-        },
+    return {
+        "Percentiles": dict(zip(percentiles, bands)),
+        "Sample paths": simulated_prices[:, np.sort(sample)],
     }
 
-    return output
-
 
 def datatable_settings_multiindex(df, flatten_char="_"):
     """ Plotly dash datatables do not natively handle multiindex dataframes. 
@@ -0,0 +1,4 @@
+from main import app
+
+# Entry point for production WSGI servers, e.g. gunicorn wsgi:server (settings in gunicorn.conf.py)
+server = app.server